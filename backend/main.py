@@ -1,22 +1,49 @@
 from fastapi import FastAPI, HTTPException, Request, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, validator, Field
 from typing import Optional, List, Dict, Any
 import mysql.connector
-from mysql.connector import pooling, Error as MySQLError
+from mysql.connector import Error as MySQLError
 import logging
+import logging.handlers
+import queue as thread_queue
+import atexit
 import json
+import orjson
 import hashlib
+import base64
+import csv
+import io
+import zlib
+from decimal import Decimal
+import ipaddress
+import re
+import unicodedata
+import random
 import os
 import asyncio
+import sqlite3
+import tempfile
+import threading
 from datetime import datetime, timedelta
 import time
-from functools import wraps
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from functools import wraps, partial, lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, OrderedDict, deque
 import weakref
 from contextlib import asynccontextmanager
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Export colonnaire (Parquet / Arrow) optionnel
+    pa = pq = None
+
 # Configuration depuis variables d'environnement avec domaines de production
 DB_HOST = os.getenv("DATABASE_HOST", "localhost")
 DB_USER = os.getenv("DATABASE_USER", "root")
@@ -35,187 +62,1198 @@ ALLOWED_ORIGINS = [
     "*"  # Pour développement - à retirer en production stricte
 ]
 RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
+# Proxys dont on accepte l'en-tête X-Forwarded-For (nginx sur le réseau Docker par défaut)
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(network.strip(), strict=False)
+    for network in os.getenv("TRUSTED_PROXIES", "127.0.0.1/32,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16").split(",")
+    if network.strip()
+]
 TARGET_RESPONSES = int(os.getenv("TARGET_RESPONSES", "200"))
 MAX_POOL_SIZE = int(os.getenv("MAX_POOL_SIZE", "15"))
+# Pool adaptatif : connexions gardées ouvertes au repos, attente maximale d'une connexion, requêtes en file au-delà du pool
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_CHECKOUT_TIMEOUT_MS = int(os.getenv("DB_CHECKOUT_TIMEOUT_MS", "2000"))
+DB_WAIT_QUEUE_MAX = int(os.getenv("DB_WAIT_QUEUE_MAX", str(MAX_POOL_SIZE * 10)))
+# Connexions inactives fermées (au-delà de DB_POOL_MIN_SIZE) et vérifiées (ping) au-delà de ces durées
+DB_POOL_IDLE_TIMEOUT_S = float(os.getenv("DB_POOL_IDLE_TIMEOUT_S", "300"))
+DB_POOL_PING_AFTER_S = float(os.getenv("DB_POOL_PING_AFTER_S", "30"))
+DB_POOL_MAINTENANCE_S = float(os.getenv("DB_POOL_MAINTENANCE_S", "30"))
+# Sonde de santé DB en tâche de fond : période, délai d'un ping, échecs consécutifs avant de ne plus être prêt
+DB_HEALTH_INTERVAL_S = float(os.getenv("DB_HEALTH_INTERVAL_S", "5"))
+DB_HEALTH_TIMEOUT_S = float(os.getenv("DB_HEALTH_TIMEOUT_S", "3"))
+DB_HEALTH_FAILURE_THRESHOLD = int(os.getenv("DB_HEALTH_FAILURE_THRESHOLD", "3"))
+# Initialisation de la base en tâche de fond : délai maximal entre deux tentatives, attente du verrou de migration
+DB_INIT_RETRY_MAX_S = float(os.getenv("DB_INIT_RETRY_MAX_S", "30"))
+SCHEMA_LOCK_TIMEOUT_S = int(os.getenv("SCHEMA_LOCK_TIMEOUT_S", "60"))
+# Par défaut, autant de threads DB que de connexions dans le pool : le pool ne peut pas être épuisé par l'exécuteur
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", str(MAX_POOL_SIZE)))
 ENVIRONMENT = os.getenv("ENVIRONMENT", "production")
+# Mode d'ingestion de /submit : "direct" (un INSERT + commit par requête) ou "batched" (write-behind groupé)
+INGEST_MODE = os.getenv("INGEST_MODE", "direct").lower()
+INGEST_QUEUE_MAX = int(os.getenv("INGEST_QUEUE_MAX", "2000"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "50"))
+INGEST_FLUSH_MS = int(os.getenv("INGEST_FLUSH_MS", "50"))
+# Recherche plein texte : longueur minimale des mots indexés (doit correspondre à innodb_ft_min_token_size)
+SEARCH_MIN_TOKEN_SIZE = int(os.getenv("SEARCH_MIN_TOKEN_SIZE", "2"))
+# Intervalle de réconciliation des statistiques en mémoire avec la base (secondes)
+STATS_RECONCILE_INTERVAL = int(os.getenv("STATS_RECONCILE_INTERVAL", "300"))
+# Avec plusieurs workers : délai minimal entre deux rattrapages des insertions faites par les autres process
+STATS_SYNC_MIN_INTERVAL_MS = int(os.getenv("STATS_SYNC_MIN_INTERVAL_MS", "500"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+# Flux /progress/stream : battement de cœur, rafraîchissement multi-workers, regroupement des rafales, file par client
+PROGRESS_STREAM_HEARTBEAT_S = float(os.getenv("PROGRESS_STREAM_HEARTBEAT_S", "15"))
+PROGRESS_STREAM_TICK_S = float(os.getenv("PROGRESS_STREAM_TICK_S", "2"))
+PROGRESS_STREAM_MIN_INTERVAL_MS = int(os.getenv("PROGRESS_STREAM_MIN_INTERVAL_MS", "250"))
+PROGRESS_STREAM_QUEUE_MAX = int(os.getenv("PROGRESS_STREAM_QUEUE_MAX", "8"))
+PROGRESS_STREAM_MAX_CLIENTS = int(os.getenv("PROGRESS_STREAM_MAX_CLIENTS", "500"))
+# Export : nombre de lignes lues par paquet sur le curseur serveur
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "500"))
+# Export colonnaire : lignes par lot Arrow (= taille des row groups Parquet)
+EXPORT_COLUMNAR_BATCH_ROWS = int(os.getenv("EXPORT_COLUMNAR_BATCH_ROWS", "10000"))
+# État partagé (rate limiting, générations de cache, compteurs) : "memory" (un seul process) ou "sqlite" (plusieurs workers)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()
+STATE_SQLITE_PATH = os.getenv("STATE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "questionnaire_state.sqlite3"))
+# SQLite : attente maximale du verrou d'écriture tenu par un autre worker, fraîcheur des générations de cache lues
+STATE_SQLITE_TIMEOUT_MS = int(os.getenv("STATE_SQLITE_TIMEOUT_MS", "500"))
+STATE_COUNTER_REFRESH_MS = int(os.getenv("STATE_COUNTER_REFRESH_MS", "100"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Préfiltre des doublons : "auto" (si l'état est partagé ou avec un seul worker) ou "off" (plusieurs conteneurs / hôtes)
+DEDUP_PREFILTER = os.getenv("DEDUP_PREFILTER", "auto").lower()
+# Sous charge d'écriture, une entrée invalidée reste servie au plus ce délai avant d'être recalculée
+CACHE_MIN_REFRESH_MS = int(os.getenv("CACHE_MIN_REFRESH_MS", "1000"))
+# Journal des requêtes lentes : seuil, part des requêtes rapides agrégées, empreintes suivies, capture EXPLAIN
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "1.0"))
+SLOW_QUERY_MAX_FINGERPRINTS = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", "500"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
 
-# Configuration logging optimisée pour la production
-logging.basicConfig(
-    level=logging.INFO if ENVIRONMENT == "production" else logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('questionnaire_api.log') if os.getenv("LOG_TO_FILE", "true").lower() == "true" else logging.NullHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+# Journalisation : format (json | text), fichier avec rotation à la taille ou à l'heure (LOG_ROTATE_WHEN=midnight...),
+# file d'attente vers le thread d'écriture, part gardée des lignes INFO à fort volume (LOG_SAMPLE_RATES=type=taux,...)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_TO_FILE = os.getenv("LOG_TO_FILE", "true").lower() == "true"
+LOG_FILE = os.getenv("LOG_FILE", "questionnaire_api.log")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(20 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "")
+LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX", "10000"))
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+LOG_SAMPLE_RATES = {
+    name.strip(): float(rate)
+    for name, _, rate in (item.partition("=") for item in os.getenv("LOG_SAMPLE_RATES", "").split(","))
+    if name.strip() and rate
+}
+
+class JsonLogFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement ; les champs passés par extra= sont repris tels quels"""
+    RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in self.RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+class LogSampler(logging.Filter):
+    """
+    Garde 1 enregistrement sur N par type (extra={"sample": type}) pour les messages INFO et DEBUG.
+    Taux ramené dans [0, 1] : 1 (ou plus) garde tout, 0 (ou moins) n'en garde aucun
+    """
+
+    def __init__(self, default_rate: float, rates: dict):
+        super().__init__()
+        self.default_every = self._every(default_rate)
+        self.every = {kind: self._every(rate) for kind, rate in rates.items()}
+        self.seen = Counter()
+        self.dropped = 0
+
+    @staticmethod
+    def _every(rate: float) -> int:
+        rate = min(max(rate, 0.0), 1.0)
+        return round(1 / rate) if rate > 0 else 0
+
+    def filter(self, record):
+        kind = getattr(record, "sample", None)
+        if kind is None or record.levelno > logging.INFO:
+            return True
+        every = self.every.get(kind, self.default_every)
+        seen = self.seen[kind]
+        self.seen[kind] = seen + 1
+        if not every or seen % every:
+            self.dropped += 1
+            return False
+        # Permet de reconstituer les volumes à partir des lignes gardées
+        record.sample_every = every
+        return True
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Dépose les enregistrements dans une file bornée : l'appelant n'écrit jamais sur disque et ne bloque pas"""
 
-# Pool de connexions global
-connection_pool = None
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
 
-# Cache simple en mémoire (sans dépendances externes)
-simple_cache = {}
-cache_timestamps = {}
+    def prepare(self, record):
+        # Seul le message est figé ici ; JSON, traceback et écriture sont faits par le thread du QueueListener
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        return record
 
-def get_from_simple_cache(key: str, ttl: int = 10):
-    """Cache simple sans Redis pour éviter les dépendances"""
-    if key in simple_cache:
-        if time.time() - cache_timestamps.get(key, 0) < ttl:
-            return simple_cache[key]
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except thread_queue.Full:
+            self.dropped += 1
+
+def configure_logging():
+    handlers = [logging.StreamHandler()]
+    if LOG_TO_FILE:
+        if LOG_ROTATE_WHEN:
+            handlers.append(logging.handlers.TimedRotatingFileHandler(
+                LOG_FILE, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True))
         else:
-            simple_cache.pop(key, None)
-            cache_timestamps.pop(key, None)
-    return None
+            handlers.append(logging.handlers.RotatingFileHandler(
+                LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True))
+    formatter = JsonLogFormatter() if LOG_FORMAT == "json" else logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    queue_handler = NonBlockingQueueHandler(thread_queue.Queue(LOG_QUEUE_MAX))
+    sampler = LogSampler(LOG_SAMPLE_RATE, LOG_SAMPLE_RATES)
+    queue_handler.addFilter(sampler)
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(logging.INFO if ENVIRONMENT == "production" else logging.DEBUG)
+    
+    listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Vider la file à l'arrêt du process (les derniers messages suivent la fin du lifespan)
+    atexit.register(listener.stop)
+    return queue_handler, sampler
+
+log_queue_handler, log_sampler = configure_logging()
+logger = logging.getLogger(__name__)
+
+# Métriques au format texte Prometheus, sans dépendance : compteurs, jauges et histogrammes minimaux
+# Les valeurs déjà tenues ailleurs (cache, rate limiting, doublons...) sont lues au moment du scrape
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class CounterMetric:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        # Sans labels, la série existe dès le départ (0 plutôt qu'absente)
+        self._values = {} if labelnames else {(): 0}
+        # Incrémentés aussi depuis les threads de l'exécuteur DB
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+class GaugeMetric(CounterMetric):
+    kind = "gauge"
 
-def set_simple_cache(key: str, value: any, ttl: int = 10):
-    """Définir une valeur dans le cache simple"""
-    simple_cache[key] = value
-    cache_timestamps[key] = time.time()
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
 
-def clear_simple_cache():
-    """Vider le cache simple"""
-    simple_cache.clear()
-    cache_timestamps.clear()
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
 
-# Rate limiting en mémoire optimisé
-class InMemoryRateLimit:
+class HistogramMetric:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [compteurs par bucket (+Inf en dernier), somme, nombre]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+class MetricsRegistry:
     def __init__(self):
-        self.requests = {}
-        self.cleanup_interval = 300  # 5 minutes
-        self.last_cleanup = time.time()
-    
-    def is_rate_limited(self, client_ip: str, max_requests: int = RATE_LIMIT_PER_MINUTE) -> bool:
-        current_time = time.time()
-        
-        # Nettoyage périodique
-        if current_time - self.last_cleanup > self.cleanup_interval:
-            self._cleanup_old_entries()
-            self.last_cleanup = current_time
-        
-        # Vérifier les requêtes pour cette IP
-        if client_ip not in self.requests:
-            self.requests[client_ip] = []
-        
-        # Supprimer les requêtes plus anciennes qu'une minute
-        minute_ago = current_time - 60
-        self.requests[client_ip] = [
-            req_time for req_time in self.requests[client_ip] 
-            if req_time > minute_ago
-        ]
-        
-        # Vérifier si la limite est dépassée
-        if len(self.requests[client_ip]) >= max_requests:
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, func):
+        """Fonction appelée au scrape, produisant des tuples (nom, type, aide, valeur)"""
+        self._collectors.append(func)
+        return func
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collector in self._collectors:
+            try:
+                for name, kind, help_text, value in collector():
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    lines.append(f"{name} {value}")
+            except Exception as e:
+                logger.warning("⚠️ Metrics collector %s failed: %s", collector.__name__, e)
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+http_requests_total = metrics.register(CounterMetric(
+    "http_requests_total", "Requêtes HTTP traitées", ("method", "route", "status")))
+http_request_duration = metrics.register(HistogramMetric(
+    "http_request_duration_seconds", "Durée des requêtes HTTP (hors flux SSE)", ("method", "route")))
+http_requests_in_flight = metrics.register(GaugeMetric(
+    "http_requests_in_flight", "Requêtes HTTP en cours"))
+db_query_duration = metrics.register(HistogramMetric(
+    "db_query_duration_seconds", "Durée des appels base de données par requête nommée", ("statement",)))
+db_executor_wait = metrics.register(HistogramMetric(
+    "db_executor_wait_seconds", "Attente d'un thread de l'exécuteur DB (file d'attente devant le pool)"))
+db_pool_wait = metrics.register(HistogramMetric(
+    "db_pool_wait_seconds", "Attente d'admission au pool (file d'attente asynchrone)"))
+db_pool_checkout = metrics.register(HistogramMetric(
+    "db_pool_checkout_seconds", "Durée d'obtention d'une connexion du pool (ouverture ou ping compris)"))
+db_pool_rejections = metrics.register(CounterMetric(
+    "db_pool_rejections_total", "Demandes de connexion refusées avec un 503", ("reason",)))
+db_connections_in_use = metrics.register(GaugeMetric(
+    "db_connections_in_use", "Connexions DB actuellement empruntées"))
+db_slow_queries = metrics.register(CounterMetric(
+    "db_slow_queries_total", "Requêtes SQL au-dessus de SLOW_QUERY_THRESHOLD_MS"))
+
+# Pool de connexions adaptatif
+class DatabaseBusy(Exception):
+    """Aucune connexion obtenue dans le délai : réponse 503 plutôt qu'une connexion ouverte hors pool"""
+
+class ConnectionPool:
+    """
+    Pool MySQL de taille variable (DB_POOL_MIN_SIZE..MAX_POOL_SIZE) avec attente bornée.
+    Côté boucle d'événements, un sémaphore de max_size jetons limite les appels DB simultanés :
+    au-delà, au plus wait_queue_max requêtes attendent checkout_timeout avant un 503.
+    Côté threads de l'exécuteur, les connexions s'ouvrent à la demande et celles restées inactives
+    plus de idle_timeout sont refermées par maintain() ; seules celles inactives depuis ping_after sont vérifiées.
+    """
+
+    def __init__(self, min_size: int, max_size: int, checkout_timeout_ms: int, wait_queue_max: int,
+                 idle_timeout_s: float, ping_after_s: float):
+        self.max_size = max(max_size, 1)
+        self.min_size = min(max(min_size, 0), self.max_size)
+        self.checkout_timeout = checkout_timeout_ms / 1000
+        self.wait_queue_max = wait_queue_max
+        self.idle_timeout = idle_timeout_s
+        self.ping_after = ping_after_s
+        # (connexion, date de retour), dans l'ordre des retours : emprunt LIFO, les plus anciennes expirent
+        self._idle = deque()
+        # Connexions ouvertes ou en cours d'ouverture, empruntées ou non
+        self._size = 0
+        self._cond = threading.Condition()
+        self._admission = asyncio.Semaphore(self.max_size)
+        self.waiting = 0
+        self.opened = 0
+        self.closed = 0
+        self.pings = 0
+        self.rejected = Counter()
+
+    def _connect(self):
+        conn = mysql.connector.connect(
+            host=DB_HOST,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            database=DB_NAME,
+            charset='utf8mb4',
+            collation='utf8mb4_unicode_ci',
+            autocommit=False,
+            connect_timeout=10,
+            use_unicode=True
+        )
+        self.opened += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        self.closed += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _forget(self):
+        """Libérer la place d'une connexion fermée ou jamais ouverte"""
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _reject(self, reason: str, message: str):
+        self.rejected[reason] += 1
+        db_pool_rejections.inc(reason)
+        raise DatabaseBusy(message)
+
+    async def admit(self):
+        """Prendre un jeton (boucle d'événements) : DatabaseBusy si la file est pleine ou le délai dépassé"""
+        if self._admission.locked() and self.waiting >= self.wait_queue_max:
+            self._reject("queue_full", f"file d'attente du pool pleine ({self.wait_queue_max})")
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.checkout_timeout):
+                await self._admission.acquire()
+        except TimeoutError:
+            self._reject("timeout", f"aucune connexion libre en {self.checkout_timeout * 1000:.0f} ms")
+        finally:
+            self.waiting -= 1
+            db_pool_wait.observe(time.perf_counter() - start)
+
+    def dismiss(self):
+        """Rendre le jeton pris par admit()"""
+        self._admission.release()
+
+    def acquire(self):
+        """Emprunter une connexion (thread de l'exécuteur DB)"""
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.checkout_timeout
+        conn = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                # Seulement pour un emprunt sans jeton : avec admit(), une connexion est toujours disponible
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._reject("timeout", f"aucune connexion libre en {self.checkout_timeout * 1000:.0f} ms")
+                self._cond.wait(remaining)
+        
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif time.monotonic() - returned_at >= self.ping_after:
+                conn = self._revalidate(conn)
+        except Exception:
+            self._forget()
+            raise
+        db_pool_checkout.observe(time.perf_counter() - start)
+        db_connections_in_use.inc()
+        return conn
+
+    def _revalidate(self, conn):
+        """Ping d'une connexion restée inactive (coupée par wait_timeout, redémarrage MySQL...)"""
+        self.pings += 1
+        try:
+            conn.ping(reconnect=False)
+            return conn
+        except Exception:
+            self._close_quietly(conn)
+            return self._connect()
+
+    def release(self, conn, broken: bool = False):
+        """Rendre une connexion ; une transaction restée ouverte est annulée (pas de reset de session à chaque retour)"""
+        db_connections_in_use.dec()
+        if not broken:
+            try:
+                if conn.unread_result:
+                    conn.consume_results()
+                if conn.in_transaction:
+                    conn.rollback()
+            except Exception:
+                broken = True
+        if broken:
+            self._close_quietly(conn)
+            self._forget()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def maintain(self) -> tuple:
+        """Fermer les connexions inactives depuis idle_timeout au-delà de min_size, puis ouvrir jusqu'à min_size"""
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            while self._idle and self._size > self.min_size and now - self._idle[0][1] >= self.idle_timeout:
+                expired.append(self._idle.popleft()[0])
+                self._size -= 1
+            missing = max(self.min_size - self._size, 0)
+            self._size += missing
+        for conn in expired:
+            self._close_quietly(conn)
+        
+        opened = 0
+        try:
+            for _ in range(missing):
+                conn = self._connect()
+                opened += 1
+                with self._cond:
+                    self._idle.append((conn, time.monotonic()))
+                    self._cond.notify()
+        finally:
+            # Places réservées mais non ouvertes (MySQL indisponible) : rendues
+            with self._cond:
+                self._size -= missing - opened
+                self._cond.notify_all()
+        return len(expired), opened
+
+    def close(self):
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            size, idle = self._size, len(self._idle)
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "open": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "waiting": self.waiting,
+            "wait_queue_max": self.wait_queue_max,
+            "checkout_timeout_ms": int(self.checkout_timeout * 1000),
+            "opened": self.opened,
+            "closed": self.closed,
+            "pings": self.pings,
+            "rejected": dict(self.rejected)
+        }
+
+# Pool de connexions global (les connexions s'ouvrent à la demande : utilisable même si MySQL démarre après l'API)
+connection_pool = ConnectionPool(
+    DB_POOL_MIN_SIZE, MAX_POOL_SIZE, DB_CHECKOUT_TIMEOUT_MS, DB_WAIT_QUEUE_MAX,
+    DB_POOL_IDLE_TIMEOUT_S, DB_POOL_PING_AFTER_S
+)
+
+# Cache en mémoire (sans dépendances externes)
+_MISSING = object()
+
+# Tags de données dont dérivent les entrées du cache : une écriture n'incrémente que les générations concernées
+CACHE_TAG_COUNT = "count"
+CACHE_TAG_AGGREGATES = "aggregates"
+CACHE_TAG_LATEST = "latest"
+CACHE_TAG_RESPONSES = "responses"
+
+class TTLCache:
+    """Cache LRU borné avec TTL par entrée, invalidation par générations, coalescence des calculs concurrents et compteurs"""
+
+    # Entrées examinées en tête de LRU à chaque écriture pour en retirer les expirées
+    SWEEP_BATCH = 4
+
+    def __init__(self, state, max_entries: int = CACHE_MAX_ENTRIES, min_refresh_ms: int = CACHE_MIN_REFRESH_MS):
+        # Les générations vivent dans le backend d'état : une écriture invalide le cache de tous les workers
+        self.state = state
+        self.max_entries = max(max_entries, 1)
+        self.min_refresh = max(min_refresh_ms, 0) / 1000
+        self._entries = OrderedDict()  # key -> (expires_at, value, deps, stored_at)
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_hits = 0
+        self.coalesced = 0
+
+    def _dependencies(self, tags) -> tuple:
+        if not tags:
+            return ()
+        generations = self.state.get_counters([f"gen:{tag}" for tag in tags])
+        return tuple((tag, generations[f"gen:{tag}"]) for tag in tags)
+
+    def _is_current(self, deps: tuple) -> bool:
+        return self._dependencies([tag for tag, _ in deps]) == deps
+
+    def _peek(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value, deps, stored_at = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            del self._entries[key]
+            self.expirations += 1
+            return _MISSING
+        if deps and not self._is_current(deps):
+            # Entrée invalidée : servie encore tant qu'elle a moins de min_refresh pour limiter les recalculs en rafale
+            if now - stored_at >= self.min_refresh:
+                del self._entries[key]
+                self.invalidations += 1
+                return _MISSING
+            self.stale_hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def invalidate(self, *tags) -> dict:
+        """Incrémenter la génération des tags : les entrées qui en dérivent deviennent périmées"""
+        try:
+            return {tag: self.state.incr(f"gen:{tag}") for tag in tags}
+        except Exception as e:
+            # L'écriture a déjà eu lieu : pas d'erreur pour le client, les entrées expirent à leur TTL
+            # (pas de relecture des générations sur le backend qui vient d'échouer)
+            logger.warning("⚠️ Cache invalidation failed for %s: %s", ", ".join(tags), e)
+            return {}
+
+    def get(self, key: str, default=None):
+        value = self._peek(key)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value, ttl: float, tags=(), deps: tuple = None):
+        now = time.monotonic()
+        deps = self._dependencies(tags) if deps is None else deps
+        self._entries[key] = (now + ttl, value, deps, now)
+        self._entries.move_to_end(key)
+        self._sweep(now)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _sweep(self, now: float):
+        """Expiration amortie en tête de LRU (O(1) par écriture) ; les autres expirées sont retirées à la lecture"""
+        for _ in range(self.SWEEP_BATCH):
+            if not self._entries:
+                return
+            key = next(iter(self._entries))
+            if self._entries[key][0] > now:
+                return
+            del self._entries[key]
+            self.expirations += 1
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def compute(self, key: str, ttl: float, factory, tags=()):
+        """Calculer et mettre en cache une valeur ; les appels concurrents sur la même clé attendent le même calcul"""
+        value = self._peek(key)
+        if value is not _MISSING:
+            return value
+        
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        # Générations relevées avant le calcul : une écriture concurrente rend le résultat périmé
+        deps = self._dependencies(tags)
+        try:
+            value = await factory()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # Marquer l'exception comme lue si personne n'attendait
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        
+        self.set(key, value, ttl, deps=deps)
+        future.set_result(value)
+        return value
+
+    async def get_or_compute(self, key: str, ttl: float, factory, tags=()):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        return await self.compute(key, ttl, factory, tags)
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "stale_hits": self.stale_hits,
+            "min_refresh_ms": int(self.min_refresh * 1000),
+            "generations": dict(self._dependencies(
+                (CACHE_TAG_COUNT, CACHE_TAG_AGGREGATES, CACHE_TAG_LATEST, CACHE_TAG_RESPONSES)
+            )),
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight)
+        }
+
+# Rate limiting en mémoire : compteur à fenêtre glissante, mémoire fixe par clé
+class SlidingWindowRateLimit:
+    """Limiteur à fenêtre glissante : chaque clé ne garde que l'index de fenêtre et deux compteurs"""
+
+    def __init__(self, window_seconds: int = 60, sweep_batch: int = 4):
+        self.window = window_seconds
+        self.sweep_batch = sweep_batch
+        # Ordre = dernier accès : les clés inactives se retrouvent en tête et sont expirées au fil de l'eau
+        self._entries = OrderedDict()  # key -> [window_index, current_count, previous_count]
+        self._swept_window = None
+        self.rejected = 0
+        self.expired = 0
+
+    @property
+    def active_keys(self) -> int:
+        return len(self._entries)
+
+    def is_rate_limited(self, key: str, max_requests: int = RATE_LIMIT_PER_MINUTE) -> bool:
+        now = time.time()
+        window_index = int(now // self.window)
+        
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = [window_index, 0, 0]
+            self._entries[key] = entry
+        else:
+            self._entries.move_to_end(key)
+            if entry[0] != window_index:
+                # Bascule de fenêtre : le compteur courant devient le précédent s'il est contigu
+                entry[2] = entry[1] if entry[0] == window_index - 1 else 0
+                entry[1] = 0
+                entry[0] = window_index
+        
+        self._sweep(window_index)
+        
+        # Estimation glissante : la fenêtre précédente est pondérée par la part encore couverte
+        elapsed = (now - window_index * self.window) / self.window
+        if entry[2] * (1 - elapsed) + entry[1] >= max_requests:
+            self.rejected += 1
             return True
         
-        # Ajouter cette requête
-        self.requests[client_ip].append(current_time)
+        entry[1] += 1
         return False
-    
-    def _cleanup_old_entries(self):
-        current_time = time.time()
-        minute_ago = current_time - 60
-        
-        for ip in list(self.requests.keys()):
-            if ip in self.requests:
-                self.requests[ip] = [
-                    req_time for req_time in self.requests[ip] 
-                    if req_time > minute_ago
-                ]
-                if not self.requests[ip]:
-                    del self.requests[ip]
-
-rate_limiter = InMemoryRateLimit()
-
-# Configuration du pool de connexions avec retry et fallback
-def create_connection_pool():
-    global connection_pool
-    max_retries = 3
-    retry_delay = 2
-    
-    for attempt in range(max_retries):
+
+    def _sweep(self, window_index: int):
+        # Expiration amortie : quelques clés au plus par appel, jamais de parcours complet
+        if self._swept_window == window_index:
+            return
+        for _ in range(self.sweep_batch):
+            if not self._entries:
+                break
+            key, entry = next(iter(self._entries.items()))
+            if entry[0] >= window_index - 1:
+                # La tête est la clé la moins récente : rien d'autre n'expire avant la prochaine fenêtre
+                self._swept_window = window_index
+                return
+            del self._entries[key]
+            self.expired += 1
+
+    def clear(self):
+        self._entries.clear()
+
+# Fenêtre de détection des doublons (identique aux requêtes SQL de check_duplicate_submission)
+DEDUP_WINDOW_SECONDS = 24 * 3600
+
+class RecentKeySet:
+    """Clés vues sur une fenêtre glissante : dict clé -> dernier passage, expiration par buckets horaires"""
+
+    def __init__(self, window_seconds: int = DEDUP_WINDOW_SECONDS, bucket_seconds: int = 3600):
+        self.window = window_seconds
+        self.bucket = bucket_seconds
+        self._seen = {}
+        self._buckets = {}  # bucket index -> clés ajoutées dans ce bucket
+        self._expired_before = None
+
+    def __len__(self):
+        return len(self._seen)
+
+    def add(self, key: str, at: float = None):
+        at = at or time.time()
+        if at > self._seen.get(key, 0):
+            self._seen[key] = at
+        self._buckets.setdefault(int(at // self.bucket), []).append(key)
+        self._expire()
+
+    def contains(self, key: str) -> bool:
+        seen_at = self._seen.get(key)
+        return seen_at is not None and seen_at > time.time() - self.window
+
+    def _expire(self):
+        # Au plus un passage par bucket : seules les clés des buckets sortis de la fenêtre sont examinées
+        cutoff = time.time() - self.window
+        oldest_bucket = int(cutoff // self.bucket)
+        if self._expired_before == oldest_bucket:
+            return
+        self._expired_before = oldest_bucket
+        for bucket in [b for b in self._buckets if b < oldest_bucket]:
+            for key in self._buckets.pop(bucket):
+                if self._seen.get(key, cutoff) < cutoff:
+                    del self._seen[key]
+
+# Backend d'état partagé : rate limiting, générations de cache, compteurs et clés de déduplication
+class StateBackend(ABC):
+    """Interface commune aux backends d'état"""
+
+    name = "abstract"
+    # True si l'état est visible par tous les workers (sinon chaque process a le sien)
+    shared = False
+    # True si un appel peut attendre un verrou : run_state() l'exécute alors hors de la boucle d'événements
+    blocking = False
+
+    @abstractmethod
+    def rate_limit_hit(self, key: str, max_requests: int, window_seconds: int = 60) -> bool:
+        """Compter une requête pour la clé, retourne True si la limite est dépassée"""
+
+    @abstractmethod
+    def incr(self, name: str, amount: int = 1) -> int:
+        pass
+
+    @abstractmethod
+    def get_counters(self, names) -> dict:
+        pass
+
+    def get_counter(self, name: str) -> int:
+        return self.get_counters([name])[name]
+
+    @abstractmethod
+    def recent_add(self, items) -> bool:
+        """Enregistrer des paires (clé, timestamp) dans l'ensemble des clés récentes, False si le verrou n'a pu être pris"""
+
+    @abstractmethod
+    def recent_contains(self, keys) -> bool:
+        """True si l'une des clés a été vue dans la fenêtre DEDUP_WINDOW_SECONDS"""
+
+    def close(self):
+        pass
+
+    def snapshot(self) -> dict:
+        return {"backend": self.name, "shared": self.shared}
+
+class InProcessStateBackend(StateBackend):
+    """État en mémoire du process : le plus rapide, valable avec un seul worker"""
+
+    name = "memory"
+
+    def __init__(self):
+        self.rate_limiters = {}  # durée de fenêtre (s) -> limiteur
+        self.counters = Counter()
+        self.recent_keys = RecentKeySet()
+
+    def rate_limit_hit(self, key: str, max_requests: int, window_seconds: int = 60) -> bool:
+        rate_limiter = self.rate_limiters.get(window_seconds)
+        if rate_limiter is None:
+            rate_limiter = self.rate_limiters[window_seconds] = SlidingWindowRateLimit(window_seconds)
+        return rate_limiter.is_rate_limited(key, max_requests)
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        self.counters[name] += amount
+        return self.counters[name]
+
+    def get_counters(self, names) -> dict:
+        return {name: self.counters[name] for name in names}
+
+    def recent_add(self, items) -> bool:
+        for key, at in items:
+            self.recent_keys.add(key, at)
+        return True
+
+    def recent_contains(self, keys) -> bool:
+        return any(self.recent_keys.contains(key) for key in keys)
+
+    def snapshot(self) -> dict:
+        return {
+            **super().snapshot(),
+            "active_keys": sum(limiter.active_keys for limiter in self.rate_limiters.values()),
+            "rejected": sum(limiter.rejected for limiter in self.rate_limiters.values()),
+            "expired_keys": sum(limiter.expired for limiter in self.rate_limiters.values()),
+            "recent_keys": len(self.recent_keys)
+        }
+
+class SQLiteStateBackend(StateBackend):
+    """
+    État partagé entre workers d'un même hôte via un fichier SQLite (WAL).
+    Une connexion par thread, sans verrou Python : les lectures WAL n'attendent jamais un écrivain,
+    les écritures attendent au plus timeout_ms le verrou d'un autre worker.
+    Les générations de cache (lues à chaque accès au cache) viennent d'un instantané rafraîchi toutes les refresh_ms
+    """
+
+    name = "sqlite"
+    shared = True
+    blocking = True
+    CLEANUP_EVERY = 1000
+
+    def __init__(self, path: str, timeout_ms: int = STATE_SQLITE_TIMEOUT_MS, counter_refresh_ms: int = STATE_COUNTER_REFRESH_MS):
+        self.path = path
+        self.timeout = timeout_ms / 1000
+        self.counter_refresh = counter_refresh_ms / 1000
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._calls = 0
+        self._counters = {}
+        self._counters_at = float("-inf")
+        self.rejected = 0
+        self.lock_timeouts = 0
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT PRIMARY KEY, window INTEGER NOT NULL, current INTEGER NOT NULL, previous INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS recent_keys (key TEXT PRIMARY KEY, seen_at REAL NOT NULL)")
+        # Compté ici et au nettoyage amorti (hors boucle) ; entre deux, seules les clés créées par ce worker s'ajoutent
+        self.active_keys = conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            # État éphémère : inutile de payer un fsync à chaque écriture
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _lock_timeout(self, operation: str, error: sqlite3.OperationalError):
+        self.lock_timeouts += 1
+        logger.warning("⚠️ State backend %s skipped: %s", operation, error)
+
+    def rate_limit_hit(self, key: str, max_requests: int, window_seconds: int = 60) -> bool:
+        now = time.time()
+        window_index = int(now // window_seconds)
+        elapsed = (now - window_index * window_seconds) / window_seconds
+        conn = self._connection()
         try:
-            logger.info(f"🔄 Creating database connection pool (attempt {attempt + 1}/{max_retries})")
-            logger.info(f"📋 Connection: host={DB_HOST}, user={DB_USER}, database={DB_NAME}")
+            # BEGIN IMMEDIATE : lecture + écriture atomiques vis-à-vis des autres workers
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            # Verrou tenu trop longtemps par un autre worker : la requête passe plutôt qu'une erreur 500
+            self._lock_timeout("rate limit", e)
+            return False
+        try:
+            row = conn.execute(
+                "SELECT window, current, previous FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+            current, previous = 0, 0
+            if row:
+                if row[0] == window_index:
+                    current, previous = row[1], row[2]
+                elif row[0] == window_index - 1:
+                    previous = row[1]
             
-            # Test connection first
-            test_conn = mysql.connector.connect(
-                host=DB_HOST,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                database=DB_NAME,
-                charset='utf8mb4',
-                collation='utf8mb4_unicode_ci',
-                connect_timeout=10,
-                autocommit=False
+            limited = previous * (1 - elapsed) + current >= max_requests
+            if not limited:
+                current += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (key, window, current, previous) VALUES (?, ?, ?, ?)",
+                (key, window_index, current, previous)
             )
+            if row is None:
+                self.active_keys += 1
             
-            # Test query
-            cursor = test_conn.cursor()
-            cursor.execute("SELECT 1")
-            cursor.fetchone()
-            cursor.close()
-            test_conn.close()
-            logger.info("✅ Test connection successful")
-            
-            # Create pool
-            connection_pool = pooling.MySQLConnectionPool(
-                pool_name="questionnaire_pool",
-                pool_size=MAX_POOL_SIZE,
-                pool_reset_session=True,
-                host=DB_HOST,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                database=DB_NAME,
-                charset='utf8mb4',
-                collation='utf8mb4_unicode_ci',
-                autocommit=False,
-                connect_timeout=10,
-                use_unicode=True
+            self._calls += 1
+            if self._calls % self.CLEANUP_EVERY == 0:
+                # Expiration amortie des clés inactives depuis plus d'une fenêtre
+                conn.execute("DELETE FROM rate_limits WHERE window < ?", (window_index - 1,))
+                self.active_keys = conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if limited:
+            self.rejected += 1
+        return limited
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        value = self._connection().execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value RETURNING value",
+            (name, amount)
+        ).fetchone()[0]
+        # Visible tout de suite par ce worker, sans attendre le prochain rafraîchissement
+        self._counters = {**self._counters, name: value}
+        return value
+
+    def get_counters(self, names) -> dict:
+        now = time.monotonic()
+        if now - self._counters_at >= self.counter_refresh:
+            self._counters = dict(self._connection().execute("SELECT name, value FROM counters").fetchall())
+            self._counters_at = now
+        counters = self._counters
+        return {name: counters.get(name, 0) for name in names}
+
+    def recent_add(self, items) -> bool:
+        items = list(items)
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            # Comme rate_limit_hit : pas d'erreur remontée, l'appelant sait que les clés manquent
+            self._lock_timeout("recent keys", e)
+            return False
+        try:
+            conn.executemany(
+                "INSERT INTO recent_keys (key, seen_at) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET seen_at = MAX(seen_at, excluded.seen_at)",
+                [(key, at or time.time()) for key, at in items]
             )
-            logger.info(f"✅ Database connection pool created with {MAX_POOL_SIZE} connections")
-            return
-            
-        except mysql.connector.Error as e:
-            logger.error(f"❌ Database connection attempt {attempt + 1} failed: {str(e)}")
-            if attempt < max_retries - 1:
-                logger.info(f"⏳ Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-                retry_delay *= 2
-            else:
-                logger.error("❌ All database connection attempts failed")
-                raise
-        except Exception as e:
-            logger.error(f"❌ Unexpected error: {str(e)}")
+            self._calls += len(items)
+            if self._calls % self.CLEANUP_EVERY < len(items):
+                conn.execute("DELETE FROM recent_keys WHERE seen_at <= ?", (time.time() - DEDUP_WINDOW_SECONDS,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
             raise
+        return True
+
+    def recent_contains(self, keys) -> bool:
+        keys = list(keys)
+        row = self._connection().execute(
+            f"SELECT 1 FROM recent_keys WHERE key IN ({', '.join('?' * len(keys))}) AND seen_at > ? LIMIT 1",
+            [*keys, time.time() - DEDUP_WINDOW_SECONDS]
+        ).fetchone()
+        return row is not None
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    def snapshot(self) -> dict:
+        # Lu par /metrics et /monitoring sur la boucle : valeur tenue à jour, pas de COUNT(*)
+        return {
+            **super().snapshot(),
+            "path": self.path,
+            "active_keys": self.active_keys,
+            "rejected": self.rejected,
+            "lock_timeouts": self.lock_timeouts
+        }
+
+def create_state_backend() -> StateBackend:
+    if STATE_BACKEND == "sqlite":
+        return SQLiteStateBackend(STATE_SQLITE_PATH)
+    if STATE_BACKEND != "memory":
+        logger.warning("⚠️ Unknown STATE_BACKEND '%s' - using in-process state", STATE_BACKEND)
+    return InProcessStateBackend()
+
+state_backend = create_state_backend()
+
+async def run_state(func, *args):
+    """Appel touchant le backend d'état depuis la boucle : dans un thread si ce backend peut attendre un verrou"""
+    if not state_backend.blocking:
+        return func(*args)
+    return await asyncio.to_thread(func, *args)
+
+response_cache = TTLCache(state_backend)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    logger.info(f"🚀 Starting Questionnaire IA API v2.2 - Environment: {ENVIRONMENT}")
+    logger.info("🚀 Starting Questionnaire IA API v2.2 - Environment: %s", ENVIRONMENT)
+    logger.info("🗂️ State backend: %s (workers=%s)", state_backend.name, WEB_CONCURRENCY)
+    if WEB_CONCURRENCY > 1 and not state_backend.shared:
+        logger.warning("⚠️ Several workers with in-process state: rate limits and cache invalidation are per worker, "
+                       "duplicate prefilter disabled (set STATE_BACKEND=sqlite)")
     
-    try:
-        create_connection_pool()
-        await initialize_database()
-        logger.info("✅ Application startup completed successfully")
-    except Exception as e:
-        logger.error(f"❌ Application startup failed: {str(e)}")
-        # Continue anyway to allow health checks
+    if ingest_pipeline:
+        ingest_pipeline.start()
+        logger.info("📦 Batched ingest enabled (batch=%s, flush=%sms, queue=%s)", INGEST_BATCH_SIZE, INGEST_FLUSH_MS, INGEST_QUEUE_MAX)
+    
+    # Migrations et amorçage en tâche de fond : /health et /health/ready répondent immédiatement
+    database_startup.start()
+    # La réconciliation réessaie aussi l'amorçage s'il a échoué au démarrage
+    reconcile_task = asyncio.create_task(stats_reconcile_loop())
+    pool_task = asyncio.create_task(pool_maintenance_loop())
+    health_probe.start()
+    progress_broadcaster.start()
+    logger.info("✅ Application started (database initialization in background)")
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down API")
-    if connection_pool:
+    reconcile_task.cancel()
+    pool_task.cancel()
+    await database_startup.stop()
+    await health_probe.stop()
+    await progress_broadcaster.stop()
+    if ingest_pipeline:
+        await ingest_pipeline.stop()
+    try:
+        connection_pool.close()
+        logger.info("✅ Connection pool closed")
+    except Exception as e:
+        logger.error("❌ Error closing connection pool: %s", e)
+    db_executor.shutdown(wait=False)
+    slow_query_log.close()
+    state_backend.close()
+
+# Sérialisation JSON : orjson gère nativement datetime / date, sans conversion préalable des lignes
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+def dumps_json(content) -> bytes:
+    return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """Réponse JSON rendue par orjson"""
+
+    def render(self, content) -> bytes:
+        return dumps_json(content)
+
+def json_response(content, response: Response = None, status_code: int = 200) -> Response:
+    """
+    Rendu direct, sans le parcours jsonable_encoder de FastAPI (listes de réponses, lignes brutes de la base).
+    Les en-têtes posés sur la réponse injectée (ETag, Cache-Control) sont conservés
+    """
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+class EncodedBody:
+    """
+    Corps JSON déjà sérialisé et compressé : une entrée de cache servie sans aucun recalcul.
+    version : version des données dont il est issu, pour un ETag qui décrit ce corps et non l'état courant
+    """
+
+    __slots__ = ("raw", "gzip", "version")
+
+    def __init__(self, content, min_gzip_size: int = 1000, version: Optional[str] = None):
+        self.version = version
+        self.raw = dumps_json(content)
+        # Même seuil que le GZipMiddleware
+        if len(self.raw) >= min_gzip_size:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            self.gzip = compressor.compress(self.raw) + compressor.flush()
+        else:
+            self.gzip = None
+
+def encoded_response(request: Request, body: EncodedBody, response: Response = None) -> Response:
+    headers = dict(response.headers) if response is not None else {}
+    if body.gzip is not None:
+        headers["Vary"] = "Accept-Encoding"
+        if "gzip" in request.headers.get("accept-encoding", "").lower():
+            # Content-Encoding déjà posé : le GZipMiddleware laisse passer le corps tel quel
+            headers["Content-Encoding"] = "gzip"
+            return Response(body.gzip, media_type="application/json", headers=headers)
+    return Response(body.raw, media_type="application/json", headers=headers)
+
+async def cached_json_response(request: Request, response: Response, key: str, ttl: float, factory, tags=(),
+                               version=None, max_age: int = 0):
+    """
+    get_or_compute sur le corps final (JSON + gzip) plutôt que sur le dict.
+    Avec version (fonction sans argument), l'ETag et le 304 reposent sur la version relevée avant le calcul
+    et gardée avec le corps : une entrée périmée servie pendant min_refresh garde son ancien ETag
+    """
+    async def build():
+        data_version = version() if version is not None else None
+        return EncodedBody(await factory(), version=data_version)
+    body = await response_cache.get_or_compute(key, ttl, build, tags=tags)
+    if version is not None:
+        unchanged = not_modified(request, response, body.version, max_age)
+        if unchanged:
+            return unchanged
+    return encoded_response(request, body, response)
+
+class MetricsMiddleware:
+    """Nombre et latence des requêtes par route (modèle de chemin, pas l'URL : cardinalité bornée)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        status = 500
+        streaming = False
+        
+        async def send_with_status(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                streaming = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", ())
+                )
+            await send(message)
+        
+        http_requests_in_flight.inc()
         try:
-            connection_pool.close()
-            logger.info("✅ Connection pool closed")
-        except Exception as e:
-            logger.error(f"❌ Error closing connection pool: {e}")
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            # Route résolue par le routeur FastAPI (scope partagé)
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            http_requests_total.inc(scope["method"], route_path, status)
+            if not streaming:
+                http_request_duration.observe(time.perf_counter() - start, scope["method"], route_path)
 
 app = FastAPI(
     title="Questionnaire IA API",
     description="API pour questionnaire sur l'intelligence artificielle - Production Ready",
     version="2.2.0",
+    default_response_class=FastJSONResponse,
     lifespan=lifespan
 )
 
@@ -228,6 +1266,7 @@ app.add_middleware(
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Modèle Pydantic avec validation production
 class FormData(BaseModel):
@@ -288,7 +1327,7 @@ class FormData(BaseModel):
                 if ENVIRONMENT == "production":
                     raise ValueError(f"Maximum 30 mots autorisés, vous en avez {word_count}")
                 else:
-                    logger.warning(f"⚠️ Word limit exceeded: {word_count} words (dev mode)")
+                    logger.warning("⚠️ Word limit exceeded: %s words (dev mode)", word_count)
         return v.strip() if v else None
 
     @validator('browser_fingerprint')
@@ -301,23 +1340,49 @@ class FormData(BaseModel):
 DEVELOPER_MODE = os.getenv("DEVELOPER_MODE", "true" if ENVIRONMENT != "production" else "false").lower() == "true"
 DEVELOPER_IPS = ["127.0.0.1", "localhost", "::1", "192.168.1.1"]
 
+@lru_cache(maxsize=4096)
+def is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+def get_client_ip(request: Request) -> str:
+    """IP réelle du client : X-Forwarded-For n'est lu que si le pair direct est un proxy de confiance"""
+    cached_ip = getattr(request.state, "client_ip", None)
+    if cached_ip:
+        return cached_ip
+    
+    client_ip = request.client.host if request.client else "unknown"
+    if is_trusted_proxy(client_ip):
+        forwarded_for = request.headers.get("x-forwarded-for", "")
+        # On remonte la chaîne depuis la droite : le premier saut non fiable est le client
+        for hop in reversed(forwarded_for.split(",")):
+            hop = hop.strip()
+            if hop:
+                client_ip = hop
+                if not is_trusted_proxy(hop):
+                    break
+    
+    request.state.client_ip = client_ip
+    return client_ip
+
 def is_developer(request: Request):
     if not DEVELOPER_MODE:
         return False
-    client_ip = request.client.host
+    client_ip = get_client_ip(request)
     return client_ip in DEVELOPER_IPS or client_ip.startswith("192.168.") or client_ip.startswith("10.")
 
 def generate_user_hash(request: Request):
     try:
-        client_ip = request.client.host
+        real_ip = get_client_ip(request)
         user_agent = request.headers.get("user-agent", "unknown")
-        forwarded_for = request.headers.get("x-forwarded-for", "")
         
-        real_ip = forwarded_for.split(',')[0].strip() if forwarded_for else client_ip
         unique_string = f"{real_ip}:{user_agent}:{datetime.now().strftime('%Y-%m-%d')}"
         return hashlib.sha256(unique_string.encode()).hexdigest()
     except Exception as e:
-        logger.error(f"Error generating user hash: {str(e)}")
+        logger.error("Error generating user hash: %s", e)
         return f"fallback_{int(time.time())}"
 
 def check_duplicate_submission(conn, user_hash: str, browser_fingerprint: str = None):
@@ -349,171 +1414,1214 @@ def check_duplicate_submission(conn, user_hash: str, browser_fingerprint: str =
         return ip_count > 0 or fingerprint_count > 0
         
     except MySQLError as err:
-        logger.error(f"Error checking duplicate: {str(err)}")
+        logger.error("Error checking duplicate: %s", err)
         return False
     except Exception as e:
-        logger.error(f"Unexpected error checking duplicate: {str(e)}")
+        logger.error("Unexpected error checking duplicate: %s", e)
         return False
     finally:
         if cursor:
             cursor.close()
 
-def get_db_connection():
+def _load_recent_submissions(conn):
+    """Hash utilisateur et fingerprints des 24 dernières heures (amorçage du préfiltre)"""
+    cursor = conn.cursor()
     try:
-        if connection_pool:
-            conn = connection_pool.get_connection()
-            if conn.is_connected():
-                return conn
-        
-        # Fallback connection
-        logger.warning("⚠️ Using fallback connection (pool not available)")
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME,
-            charset='utf8mb4',
-            collation='utf8mb4_unicode_ci',
-            autocommit=False,
-            connect_timeout=10
-        )
-        return conn
-        
-    except MySQLError as err:
-        logger.error(f"Database connection failed: {str(err)}")
-        raise HTTPException(status_code=500, detail="Service temporairement indisponible")
-    except Exception as e:
-        logger.error(f"Unexpected database error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Erreur de connexion à la base de données")
+        cursor.execute("""
+            SELECT user_hash, browser_fingerprint, UNIX_TIMESTAMP(created_at)
+            FROM responses
+            WHERE created_at > DATE_SUB(NOW(), INTERVAL 24 HOUR)
+        """)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
 
-async def initialize_database():
-    logger.info("🔧 Initializing database...")
-    max_retries = 3
-    
-    for attempt in range(max_retries):
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            # Créer la base de données si elle n'existe pas
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_NAME}")
-            cursor.execute(f"USE {DB_NAME}")
-            
-            # Créer la table avec structure optimisée
+def dedup_keys(user_hash: str, browser_fingerprint: str = None) -> list:
+    keys = [f"user:{user_hash}"] if user_hash else []
+    if browser_fingerprint:
+        keys.append(f"fp:{browser_fingerprint}")
+    return keys
+
+class DedupPrefilter:
+    """Préfiltre des doublons : un négatif certain évite les requêtes SQL, un positif probable est confirmé en base"""
+
+    def __init__(self):
+        # Un négatif n'est certain que si les soumissions de tous les workers sont visibles (sinon : vérification en base)
+        self.enabled = DEDUP_PREFILTER != "off" and (state_backend.shared or WEB_CONCURRENCY == 1)
+        self.ready = False
+        self.skipped_db = 0
+        self.db_checks = 0
+        self.rejected = 0
+
+    async def warm(self):
+        if not self.enabled:
+            return 0
+        rows = await run_db(_load_recent_submissions)
+        items = []
+        for user_hash, browser_fingerprint, created_at in rows:
+            at = float(created_at) if created_at is not None else None
+            items.extend((key, at) for key in dedup_keys(user_hash, browser_fingerprint))
+        if items and not await run_state(state_backend.recent_add, items):
+            raise RuntimeError("state backend busy")
+        self.ready = True
+        return len(rows)
+
+    def definitely_new(self, user_hash: str, browser_fingerprint: str = None) -> bool:
+        # Tant que le préfiltre n'est pas amorcé, aucun négatif n'est certain
+        if not self.ready:
+            return False
+        try:
+            if state_backend.recent_contains(dedup_keys(user_hash, browser_fingerprint)):
+                return False
+        except Exception as e:
+            logger.warning("⚠️ Duplicate prefilter lookup failed, checking in database: %s", e)
+            return False
+        self.skipped_db += 1
+        return True
+
+    def remember(self, user_hash: str, browser_fingerprint: str = None):
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            if state_backend.recent_add((key, now) for key in dedup_keys(user_hash, browser_fingerprint)):
+                return
+            reason = "state backend busy"
+        except Exception as e:
+            reason = e
+        # Clé manquante : le préfiltre n'est plus fiable jusqu'au prochain amorçage (stats_reconcile_loop)
+        self.ready = False
+        logger.warning("⚠️ Duplicate prefilter disabled until next warm-up: %s", reason)
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "skipped_db_checks": self.skipped_db,
+            "db_checks": self.db_checks,
+            "rejected": self.rejected
+        }
+
+dedup_prefilter = DedupPrefilter()
+
+# Empreinte d'une requête : littéraux et paramètres remplacés par ?, listes IN repliées, espaces compactés
+_SQL_LITERAL_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SQL_SPACE_RE = re.compile(r"\s+")
+SLOW_QUERY_MAX_SHAPES = 5
+
+@lru_cache(maxsize=1024)
+def sql_fingerprint(query: str) -> str:
+    """SQL normalisé servant de clé d'agrégation (les requêtes sont des chaînes constantes : cache)"""
+    normalized = _SQL_LITERAL_RE.sub("?", query.replace("%s", "?"))
+    normalized = _SQL_IN_LIST_RE.sub("(?+)", normalized)
+    return _SQL_SPACE_RE.sub(" ", normalized).strip()
+
+def params_shape(params, many: bool = False) -> str:
+    """Forme des paramètres (types, jamais les valeurs) : deux appels de même forme ont le même plan"""
+    if many:
+        params = list(params)
+        return f"{len(params)} x {params_shape(params[0]) if params else '()'}"
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in params.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in params) + ")"
+
+class SlowQueryLog:
+    """Chronométrage de chaque cursor.execute, agrégation par empreinte et EXPLAIN des requêtes lentes"""
+
+    def __init__(self, threshold_ms: float, sample_rate: float, max_fingerprints: int, explain: bool):
+        self.threshold = threshold_ms / 1000
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.max_fingerprints = max_fingerprints
+        self.explain_enabled = explain
+        self.fingerprints = {}
+        self.explained = set()
+        self.slow = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        # Un seul thread et une connexion dédiée, hors pool : l'EXPLAIN ne concurrence jamais les requêtes de l'API
+        self._explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        self._explain_conn = None
+
+    def observe(self, query: str, params, elapsed: float, many: bool = False):
+        slow = elapsed >= self.threshold
+        # Les requêtes rapides ne sont agrégées qu'en échantillon ; les lentes toujours
+        if not slow and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return
+        
+        fingerprint = sql_fingerprint(query)
+        shape = params_shape(params, many)
+        explain_key = (fingerprint, shape)
+        with self._lock:
+            entry = self.fingerprints.get(fingerprint)
+            if entry is None:
+                if len(self.fingerprints) >= self.max_fingerprints:
+                    self.dropped += 1
+                else:
+                    entry = self.fingerprints[fingerprint] = {
+                        "fingerprint": fingerprint, "calls": 0, "slow_calls": 0,
+                        "total_s": 0.0, "max_s": 0.0, "last_slow_at": None, "shapes": {}
+                    }
+            if entry is not None:
+                entry["calls"] += 1
+                entry["total_s"] += elapsed
+                entry["max_s"] = max(entry["max_s"], elapsed)
+                if slow:
+                    entry["slow_calls"] += 1
+                    entry["last_slow_at"] = datetime.now()
+                    if shape not in entry["shapes"] and len(entry["shapes"]) < SLOW_QUERY_MAX_SHAPES:
+                        entry["shapes"][shape] = None
+            
+            needs_explain = (
+                slow and entry is not None and not many and self.explain_enabled
+                and explain_key not in self.explained and shape in entry["shapes"]
+                and fingerprint.lstrip("( ").upper().startswith(("SELECT", "WITH"))
+            )
+            if needs_explain:
+                self.explained.add(explain_key)
+            if slow:
+                self.slow += 1
+        
+        if not slow:
+            return
+        db_slow_queries.inc()
+        logger.warning("🐢 Slow query %.0f ms params=%s: %s", elapsed * 1000, shape, fingerprint)
+        if needs_explain:
+            # Les valeurs ne sont gardées que le temps de l'EXPLAIN (elles ne sont jamais stockées)
+            self._explain_executor.submit(self._explain, fingerprint, shape, query, params)
+
+    def _explain(self, fingerprint: str, shape: str, query: str, params):
+        try:
+            if self._explain_conn is None or not self._explain_conn.is_connected():
+                self._explain_conn = mysql.connector.connect(
+                    host=DB_HOST, user=DB_USER, password=DB_PASSWORD, database=DB_NAME,
+                    charset='utf8mb4', collation='utf8mb4_unicode_ci', connect_timeout=5
+                )
+            cursor = self._explain_conn.cursor()
+            try:
+                cursor.execute("EXPLAIN FORMAT=JSON " + query, params)
+                plan = json.loads(cursor.fetchone()[0])
+            finally:
+                cursor.close()
+        except Exception as e:
+            logger.warning("⚠️ EXPLAIN failed for slow query: %s", e)
+            plan = {"error": str(e)}
+        with self._lock:
+            entry = self.fingerprints.get(fingerprint)
+            if entry is not None:
+                entry["shapes"][shape] = plan
+
+    def top(self, limit: int, sort: str = "total") -> list:
+        keys = {
+            "total": lambda entry: entry["total_s"],
+            "avg": lambda entry: entry["total_s"] / entry["calls"],
+            "max": lambda entry: entry["max_s"],
+            "slow": lambda entry: entry["slow_calls"],
+        }
+        with self._lock:
+            entries = sorted(self.fingerprints.values(), key=keys[sort], reverse=True)[:limit]
+            return [
+                {
+                    "fingerprint": entry["fingerprint"],
+                    "calls": entry["calls"],
+                    "slow_calls": entry["slow_calls"],
+                    "total_ms": round(entry["total_s"] * 1000, 1),
+                    "avg_ms": round(entry["total_s"] * 1000 / entry["calls"], 2),
+                    "max_ms": round(entry["max_s"] * 1000, 1),
+                    "last_slow_at": entry["last_slow_at"],
+                    "params_shapes": [{"params": shape, "explain": plan} for shape, plan in entry["shapes"].items()]
+                }
+                for entry in entries
+            ]
+
+    def reset(self):
+        with self._lock:
+            self.fingerprints.clear()
+            self.explained.clear()
+            self.slow = 0
+            self.dropped = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "sample_rate": self.sample_rate,
+            "explain": self.explain_enabled,
+            "fingerprints": len(self.fingerprints),
+            "max_fingerprints": self.max_fingerprints,
+            "dropped_fingerprints": self.dropped,
+            "slow_queries": self.slow
+        }
+
+    def close(self):
+        self._explain_executor.shutdown(wait=False, cancel_futures=True)
+        if self._explain_conn is not None:
+            try:
+                self._explain_conn.close()
+            except Exception:
+                pass
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_SAMPLE_RATE, SLOW_QUERY_MAX_FINGERPRINTS, SLOW_QUERY_EXPLAIN)
+
+class InstrumentedCursor:
+    """Curseur mysql.connector dont execute / executemany passent par le journal des requêtes lentes"""
+    __slots__ = ("_cursor",)
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, **kwargs)
+        finally:
+            slow_query_log.observe(operation, params, time.perf_counter() - start)
+
+    def executemany(self, operation, seq_params):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params)
+        finally:
+            slow_query_log.observe(operation, seq_params, time.perf_counter() - start, many=True)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class InstrumentedConnection:
+    """Connexion rendue par get_db_connection() : seuls les curseurs sont enveloppés"""
+    __slots__ = ("raw",)
+
+    def __init__(self, conn):
+        self.raw = conn
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self.raw.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+def get_db_connection():
+    try:
+        return InstrumentedConnection(connection_pool.acquire())
+    except DatabaseBusy:
+        raise
+    except MySQLError as err:
+        logger.error("Database connection failed: %s", err)
+        raise HTTPException(status_code=500, detail="Service temporairement indisponible")
+    except Exception as e:
+        logger.error("Unexpected database error: %s", e)
+        raise HTTPException(status_code=500, detail="Erreur de connexion à la base de données")
+
+# Exécuteur dédié et borné pour tous les appels MySQL (bloquants)
+# Les endpoints async n'appellent jamais mysql.connector directement sur la boucle d'événements
+db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+def release_db_connection(conn, broken: bool = False):
+    """Rendre au pool une connexion obtenue par get_db_connection() (fermée si broken)"""
+    connection_pool.release(conn.raw, broken)
+
+def _timed_in_executor(submitted: float, func, *args, **kwargs):
+    db_executor_wait.observe(time.perf_counter() - submitted)
+    return func(*args, **kwargs)
+
+def _submit_to_db_executor(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return loop.run_in_executor(db_executor, partial(_timed_in_executor, time.perf_counter(), func, *args, **kwargs))
+
+async def run_in_db_executor(func, *args, **kwargs):
+    """Exécuter une fonction bloquante dans l'exécuteur DB"""
+    return await _submit_to_db_executor(func, *args, **kwargs)
+
+def _call_with_connection(func, *args, **kwargs):
+    conn = get_db_connection()
+    start = time.perf_counter()
+    broken = False
+    try:
+        return func(conn, *args, **kwargs)
+    except (mysql.connector.OperationalError, mysql.connector.InterfaceError):
+        # Connexion probablement perdue : elle n'est pas remise dans le pool
+        broken = True
+        raise
+    finally:
+        # Libellé borné : le nom de la fonction d'accès aux données
+        db_query_duration.observe(time.perf_counter() - start, func.__name__.lstrip("_"))
+        release_db_connection(conn, broken)
+
+async def run_db(func, *args, **kwargs):
+    """Exécuter func(conn, *args) dans l'exécuteur DB avec une connexion du pool (DatabaseBusy si saturé)"""
+    await connection_pool.admit()
+    try:
+        future = _submit_to_db_executor(_call_with_connection, func, *args, **kwargs)
+    except BaseException:
+        connection_pool.dismiss()
+        raise
+    # Jeton rendu quand le thread a fini, même si l'appelant est annulé entre-temps (client déconnecté)
+    future.add_done_callback(lambda _: connection_pool.dismiss())
+    return await asyncio.shield(future)
+
+async def pool_maintenance_loop():
+    """Réduire le pool après un pic et le garder à sa taille minimale"""
+    while True:
+        await asyncio.sleep(DB_POOL_MAINTENANCE_S)
+        try:
+            closed, opened = await run_in_db_executor(connection_pool.maintain)
+            if closed or opened:
+                logger.info("🔁 Connection pool resized: -%s idle, +%s (%s open)", closed, opened, connection_pool.snapshot()['open'])
+        except Exception as e:
+            logger.warning("⚠️ Connection pool maintenance failed: %s", e)
+
+def _ensure_column(cursor, table: str, name: str, definition: str):
+    """Ajouter une colonne manquante sur une table existante"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, name))
+    if cursor.fetchone()[0] == 0:
+        logger.info("🔧 Adding column %s on %s", name, table)
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+def _ensure_index(cursor, table: str, name: str, definition: str, kind: str = "INDEX"):
+    """Ajouter un index manquant sur une table existante (CREATE TABLE IF NOT EXISTS ne le fait pas)"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (table, name))
+    if cursor.fetchone()[0] == 0:
+        logger.info("🔧 Adding index %s on %s", name, table)
+        cursor.execute(f"ALTER TABLE {table} ADD {kind} {name} {definition}")
+
+def _drop_index(cursor, table: str, name: str):
+    """Supprimer un index obsolète s'il existe encore"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (table, name))
+    if cursor.fetchone()[0] > 0:
+        logger.info("🔧 Dropping index %s on %s", name, table)
+        cursor.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+
+def _create_responses_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS responses (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            question1 VARCHAR(255) NOT NULL,
+            question2 VARCHAR(255) NOT NULL,
+            question3 VARCHAR(255) NOT NULL,
+            question4 JSON,
+            question5 VARCHAR(255) NOT NULL,
+            question6 VARCHAR(255) NOT NULL,
+            question7 VARCHAR(255) NOT NULL,
+            question8 VARCHAR(255) NOT NULL,
+            other_sector TEXT,
+            question9 TEXT NOT NULL,
+            question10 TEXT NOT NULL,
+            question11 VARCHAR(10) NOT NULL,
+            question12 VARCHAR(50) NOT NULL,
+            question13 TEXT NOT NULL,
+            question14 TEXT NOT NULL,
+            question15 TEXT,
+            question16 TEXT,
+            user_hash VARCHAR(255),
+            browser_fingerprint VARCHAR(255),
+            submission_timestamp VARCHAR(50),
+            user_agent TEXT,
+            screen_resolution VARCHAR(20),
+            search_text TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            
+            INDEX idx_user_hash (user_hash),
+            INDEX idx_browser_fingerprint (browser_fingerprint),
+            INDEX idx_created_at (created_at),
+            INDEX idx_created_at_id (created_at, id),
+            INDEX idx_sector_created (question8, created_at, id),
+            INDEX idx_duration_created (question1, created_at, id),
+            FULLTEXT INDEX ft_search_text (search_text)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    ''')
+
+def _create_question4_table(cursor):
+    # Choix multiples de question4, une ligne par choix : comptage et filtre par index
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS response_question4 (
+            response_id INT NOT NULL,
+            choice VARCHAR(255) NOT NULL,
+            
+            PRIMARY KEY (response_id, choice),
+            INDEX idx_choice_response (choice, response_id),
+            CONSTRAINT fk_question4_response FOREIGN KEY (response_id) REFERENCES responses (id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    ''')
+
+def _add_listing_indexes(cursor):
+    # Index de la pagination par curseur (created_at, id)
+    _ensure_index(cursor, "responses", "idx_created_at_id", "(created_at, id)")
+    # Filtres secteur / durée + tri created_at DESC : parcours d'index sans tri (filesort)
+    _ensure_index(cursor, "responses", "idx_sector_created", "(question8, created_at, id)")
+    _ensure_index(cursor, "responses", "idx_duration_created", "(question1, created_at, id)")
+    # Index fonctionnel DATE(created_at) jamais utilisé (les filtres de dates sont des intervalles)
+    _drop_index(cursor, "responses", "idx_submission_day")
+
+def _add_search_text(cursor):
+    # Recherche plein texte sur les réponses libres (texte normalisé par l'application)
+    _ensure_column(cursor, "responses", "search_text", "TEXT AFTER screen_resolution")
+    _ensure_index(cursor, "responses", "ft_search_text", "(search_text)", kind="FULLTEXT INDEX")
+
+# Migrations du schéma, par version croissante ; ajouter les suivantes en fin de liste.
+# Le DDL MySQL valide implicitement la transaction : une migration interrompue avant son enregistrement
+# est rejouée au démarrage suivant, elle doit donc être sans effet si déjà appliquée (IF NOT EXISTS, _ensure_*).
+# Les bases créées avant schema_migrations passent ainsi les quatre premières sans modification.
+SCHEMA_MIGRATIONS = [
+    (1, "responses table", _create_responses_table),
+    (2, "response_question4 table", _create_question4_table),
+    (3, "cursor pagination and filter indexes", _add_listing_indexes),
+    (4, "search_text full-text index", _add_search_text),
+]
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+ER_NO_SUCH_TABLE = 1146
+ER_BAD_DB_ERROR = 1049
+
+def _schema_version(cursor) -> int:
+    """Dernière version appliquée (0 tant que la table schema_migrations n'existe pas)"""
+    try:
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    except MySQLError as e:
+        if e.errno != ER_NO_SUCH_TABLE:
+            raise
+        return 0
+    return cursor.fetchone()[0]
+
+def _migrate_database_sync(conn) -> list:
+    """Appliquer les migrations manquantes ; schéma à jour : une seule requête, sans DDL ni verrou"""
+    cursor = conn.cursor()
+    try:
+        if _schema_version(cursor) >= SCHEMA_VERSION:
+            return []
+        
+        # Plusieurs workers démarrent ensemble : un seul migre, les autres attendent le verrou puis relisent la version
+        lock_name = f"{DB_NAME}.schema_migrations"
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (lock_name, SCHEMA_LOCK_TIMEOUT_S))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError(f"schema migration lock not acquired within {SCHEMA_LOCK_TIMEOUT_S}s")
+        try:
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS responses (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    question1 VARCHAR(255) NOT NULL,
-                    question2 VARCHAR(255) NOT NULL,
-                    question3 VARCHAR(255) NOT NULL,
-                    question4 JSON,
-                    question5 VARCHAR(255) NOT NULL,
-                    question6 VARCHAR(255) NOT NULL,
-                    question7 VARCHAR(255) NOT NULL,
-                    question8 VARCHAR(255) NOT NULL,
-                    other_sector TEXT,
-                    question9 TEXT NOT NULL,
-                    question10 TEXT NOT NULL,
-                    question11 VARCHAR(10) NOT NULL,
-                    question12 VARCHAR(50) NOT NULL,
-                    question13 TEXT NOT NULL,
-                    question14 TEXT NOT NULL,
-                    question15 TEXT,
-                    question16 TEXT,
-                    user_hash VARCHAR(255),
-                    browser_fingerprint VARCHAR(255),
-                    submission_timestamp VARCHAR(50),
-                    user_agent TEXT,
-                    screen_resolution VARCHAR(20),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    
-                    INDEX idx_user_hash (user_hash),
-                    INDEX idx_browser_fingerprint (browser_fingerprint),
-                    INDEX idx_created_at (created_at),
-                    INDEX idx_submission_day (DATE(created_at))
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    duration_ms INT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             ''')
-            
+            current = _schema_version(cursor)
+            applied = []
+            for version, description, migrate in SCHEMA_MIGRATIONS:
+                if version <= current:
+                    continue
+                logger.info("🔧 Applying schema migration %s: %s", version, description)
+                start = time.perf_counter()
+                migrate(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, description, duration_ms) VALUES (%s, %s, %s)",
+                    (version, description, int((time.perf_counter() - start) * 1000))
+                )
+                conn.commit()
+                applied.append(version)
+            return applied
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (lock_name,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
+
+def _initialize_database_sync(conn):
+    """Créer la base si besoin puis la migrer, sur une connexion ouverte sans base (perf/explain_filters.py)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_NAME}")
+        cursor.execute(f"USE {DB_NAME}")
+    finally:
+        cursor.close()
+    return _migrate_database_sync(conn)
+
+def _create_database_sync():
+    """Base absente : les connexions du pool la sélectionnent à l'ouverture, elle est créée hors pool"""
+    conn = mysql.connector.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        charset='utf8mb4',
+        collation='utf8mb4_unicode_ci',
+        connect_timeout=10
+    )
+    try:
+        return _initialize_database_sync(conn)
+    finally:
+        conn.close()
+
+class DatabaseStartup:
+    """
+    Initialisation de la base en tâche de fond, l'API servant déjà /health et /health/ready :
+    migrations réessayées avec backoff tant que MySQL est injoignable, puis en parallèle
+    connexions du pool au repos, amorçage des statistiques et du préfiltre ; enfin les backfills.
+    """
+
+    def __init__(self, retry_max_s: float):
+        self.retry_max_s = retry_max_s
+        self.status = "pending"
+        self.schema_version = None
+        self.applied = []
+        self.attempts = 0
+        self.last_error = None
+        self.duration_ms = None
+        self._task = None
+
+    @property
+    def schema_ready(self) -> bool:
+        return self.schema_version is not None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    @staticmethod
+    def _cause(error: Exception) -> Exception:
+        """Erreur MySQL d'origine (get_db_connection la convertit en HTTPException 500)"""
+        return error.__context__ if isinstance(error, HTTPException) and isinstance(error.__context__, MySQLError) else error
+
+    async def _migrate(self) -> list:
+        try:
+            return await run_db(_migrate_database_sync)
+        except Exception as e:
+            if getattr(self._cause(e), "errno", None) != ER_BAD_DB_ERROR:
+                raise
+            logger.info("🔧 Creating database %s", DB_NAME)
+            return await run_in_db_executor(_create_database_sync)
+
+    async def _run(self):
+        start = time.perf_counter()
+        delay = 1
+        self.status = "migrating"
+        while True:
+            self.attempts += 1
+            try:
+                self.applied = await self._migrate()
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(self._cause(e))
+                logger.error("❌ Database initialization attempt %s failed: %s (retry in %ss)", self.attempts, self.last_error, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.retry_max_s)
+        
+        self.last_error = None
+        self.schema_version = SCHEMA_VERSION
+        if self.applied:
+            logger.info("✅ Schema migrated to version %s (applied %s)", SCHEMA_VERSION, self.applied)
+        else:
+            logger.info("✅ Schema up to date (version %s)", SCHEMA_VERSION)
+        if ingest_pipeline:
+            try:
+                await ingest_pipeline.verify()
+            except Exception as e:
+                logger.warning("⚠️ Batched ingest check failed: %s", e)
+        
+        self.status = "warming"
+        pool, stats, prefilter = await asyncio.gather(
+            run_in_db_executor(connection_pool.maintain),
+            stats_engine.reconcile(),
+            dedup_prefilter.warm(),
+            return_exceptions=True
+        )
+        # Échecs rattrapés par pool_maintenance_loop et stats_reconcile_loop
+        for name, result in (("Connection pool", pool), ("Stats engine", stats), ("Duplicate prefilter", prefilter)):
+            if isinstance(result, Exception):
+                logger.warning("⚠️ %s warm-up failed: %s", name, result)
+        if not isinstance(stats, Exception):
+            logger.info("📊 Stats engine seeded with %s responses", stats_engine.total)
+        if not isinstance(prefilter, Exception):
+            logger.info("🧹 Duplicate prefilter warmed with %s submissions from the last 24h", prefilter)
+        
+        self.status = "ready"
+        self.duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        logger.info("✅ Database startup completed in %sms (%s attempts)", self.duration_ms, self.attempts)
+        await run_backfills()
+
+    def snapshot(self) -> dict:
+        return {
+            "status": self.status,
+            "schema_version": self.schema_version,
+            "target_version": SCHEMA_VERSION,
+            "applied": self.applied,
+            "attempts": self.attempts,
+            "duration_ms": self.duration_ms,
+            "error": self.last_error
+        }
+
+database_startup = DatabaseStartup(DB_INIT_RETRY_MAX_S)
+
+def _backfill_search_text(conn, after_id: int, limit: int):
+    """Indexer un paquet de réponses antérieures à la recherche plein texte, par id croissant"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT id, {", ".join(SEARCH_TEXT_QUESTIONS)}
+            FROM responses
+            WHERE id > %s AND search_text IS NULL
+            ORDER BY id
+            LIMIT %s
+        """, (after_id, limit))
+        rows = cursor.fetchall()
+        if rows:
+            cursor.executemany(
+                "UPDATE responses SET search_text = %s WHERE id = %s",
+                [(build_search_text(row[1:]), row[0]) for row in rows]
+            )
             conn.commit()
-            cursor.close()
-            conn.close()
-            logger.info("✅ Database initialization completed")
+        return rows[-1][0] if rows else None, len(rows)
+    finally:
+        cursor.close()
+
+def _question4_backfill_bound(conn) -> int:
+    """Les lignes encore à traiter ont toutes un id inférieur au plus petit id présent (remplissage par ids décroissants)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT MIN(response_id) FROM response_question4")
+        bound = cursor.fetchone()[0]
+        if bound is None:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM responses")
+            bound = cursor.fetchone()[0]
+        return bound
+    finally:
+        cursor.close()
+
+def _backfill_question4_choices(conn, from_id: int, to_id: int):
+    """Éclater question4 (JSON) en lignes de response_question4 pour les ids de [from_id, to_id["""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT IGNORE INTO response_question4 (response_id, choice)
+            SELECT r.id, LEFT(jt.choice, 255)
+            FROM responses r,
+                 JSON_TABLE(r.question4, '$[*]' COLUMNS (choice VARCHAR(1024) PATH '$')) jt
+            WHERE r.id >= %s AND r.id < %s AND jt.choice IS NOT NULL
+        """, (from_id, to_id))
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+async def backfill_question4_choices(batch_ids: int = 5000):
+    """Tâche de fond : remplir response_question4 pour les réponses insérées avant son introduction"""
+    inserted = 0
+    try:
+        bound = await run_db(_question4_backfill_bound)
+        # Ids décroissants : une reprise après interruption repart du plus petit id déjà rempli
+        for to_id in range(bound, 1, -batch_ids):
+            inserted += await run_db(_backfill_question4_choices, max(to_id - batch_ids, 1), to_id)
+        if inserted:
+            logger.info("🗳️ Question 4 choices backfill completed: %s choices", inserted)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning("⚠️ Question 4 choices backfill stopped after %s choices: %s", inserted, e)
+
+async def run_backfills():
+    await backfill_search_text()
+    await backfill_question4_choices()
+
+async def backfill_search_text(batch_size: int = 1000):
+    """Tâche de fond : remplir search_text pour les lignes insérées avant son introduction"""
+    last_id, indexed = 0, 0
+    try:
+        while True:
+            last_id, count = await run_db(_backfill_search_text, last_id, batch_size)
+            if not count:
+                break
+            indexed += count
+        if indexed:
+            logger.info("🔎 Full-text search backfill completed: %s responses indexed", indexed)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning("⚠️ Full-text search backfill stopped after %s responses: %s", indexed, e)
+
+# Statistiques incrémentales en mémoire
+# Colonnes agrégées par /stats : clé de sortie de chaque compteur
+STATS_TRACKED_QUESTIONS = {
+    "question1": "duration",
+    "question8": "sector",
+    "question9": "answer",
+    "question12": "country",
+}
+
+def _load_stats_snapshot(conn):
+    """Lire l'état complet des statistiques depuis la table (amorçage et réconciliation)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM responses")
+        total, max_id = cursor.fetchone()
+        
+        answers = {}
+        for column in STATS_TRACKED_QUESTIONS:
+            cursor.execute(f"SELECT {column}, COUNT(*) FROM responses GROUP BY {column}")
+            answers[column] = Counter({value: count for value, count in cursor.fetchall()})
+        
+        # Buckets par minute (epoch) sur 7 jours, indépendants du fuseau horaire de la session
+        cursor.execute("""
+            SELECT UNIX_TIMESTAMP(created_at) DIV 60 as minute, COUNT(*) as count
+            FROM responses
+            WHERE created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
+            GROUP BY minute
+        """)
+        minutes = Counter({int(minute): count for minute, count in cursor.fetchall()})
+        
+        # Comptage par choix sur l'index (choice, response_id), sans lire le JSON
+        cursor.execute("SELECT choice, COUNT(*) FROM response_question4 WHERE response_id <= %s GROUP BY choice", (max_id,))
+        choices = Counter({choice: count for choice, count in cursor.fetchall()})
+        
+        return {"total": total, "max_id": max_id, "answers": answers, "minutes": minutes, "choices": choices}
+    finally:
+        cursor.close()
+
+def _load_responses_since(conn, after_id: int, limit: int):
+    """Lignes insérées après after_id et leurs choix de question4 (rattrapage des écritures des autres workers)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT id, {", ".join(STATS_TRACKED_QUESTIONS)}, UNIX_TIMESTAMP(created_at)
+            FROM responses
+            WHERE id > %s
+            ORDER BY id
+            LIMIT %s
+        """, (after_id, limit))
+        rows = cursor.fetchall()
+        choices = {}
+        if rows:
+            cursor.execute(
+                "SELECT response_id, choice FROM response_question4 WHERE response_id > %s AND response_id <= %s",
+                (after_id, rows[-1][0])
+            )
+            for response_id, choice in cursor.fetchall():
+                choices.setdefault(response_id, []).append(choice)
+        return rows, choices
+    finally:
+        cursor.close()
+
+class StatsEngine:
+    """Compteurs /count, /progress et /stats amorcés depuis la table puis mis à jour à chaque insertion"""
+
+    MINUTE_WINDOW = 24 * 60
+    HOUR_WINDOW = 7 * 24
+    SYNC_BATCH = 5000
+
+    def __init__(self):
+        self.ready = False
+        # Rattrapage multi-workers : dernier id lu en base, ids insérés localement au-delà, génération vue
+        self.synced_id = 0
+        self.synced_generation = 0
+        self._local_ids = set()
+        self._last_sync = 0.0
+        # Plus grand id connu : avec total, version des données commune à tous les workers (ETag)
+        self.max_id = 0
+        self._sync_lock = asyncio.Lock()
+        self.total = 0
+        self.answers = {column: Counter() for column in STATS_TRACKED_QUESTIONS}
+        self.choices = Counter()
+        self.minute_buckets = Counter()
+        self.hour_buckets = Counter()
+        self.last_reconcile = None
+        self.last_drift = 0
+        self._pending = None
+        self._last_prune_minute = 0
+
+    def record(self, response_id: int, answers: dict, created_at: float = None, choices: list = ()):
+        """Prendre en compte une insertion réussie"""
+        if self._pending is not None:
+            # Réconciliation en cours : l'insertion sera rejouée si l'instantané ne la contient pas
+            self._pending.append((response_id, answers, created_at, choices))
+        if state_backend.shared and response_id:
+            self._local_ids.add(response_id)
+        self.max_id = max(self.max_id, response_id or 0)
+        self._apply(answers, created_at, choices)
+
+    def note_local_write(self, generation: Optional[int]):
+        """Génération partagée après une écriture locale : pas de rattrapage si personne d'autre n'a écrit"""
+        if generation is not None and generation == self.synced_generation + 1:
+            self.synced_generation = generation
+
+    async def sync_shared(self):
+        """Rattraper les insertions des autres workers (backend d'état partagé uniquement)"""
+        if not state_backend.shared or not self.ready:
             return
-            
+        generation = state_backend.get_counter(f"gen:{CACHE_TAG_RESPONSES}")
+        if generation == self.synced_generation:
+            return
+        if time.monotonic() - self._last_sync < STATS_SYNC_MIN_INTERVAL_MS / 1000 or self._sync_lock.locked():
+            return
+        
+        async with self._sync_lock:
+            self._last_sync = time.monotonic()
+            rows, choices = await run_db(_load_responses_since, self.synced_id, self.SYNC_BATCH)
+            columns = list(STATS_TRACKED_QUESTIONS)
+            for row in rows:
+                if row[0] not in self._local_ids:
+                    self._apply(dict(zip(columns, row[1:-1])), float(row[-1]), choices.get(row[0], ()))
+            if rows:
+                self.synced_id = rows[-1][0]
+                self.max_id = max(self.max_id, self.synced_id)
+                self._local_ids = {i for i in self._local_ids if i > self.synced_id}
+            # Lot incomplet : tout est rattrapé jusqu'à la génération lue
+            if len(rows) < self.SYNC_BATCH:
+                self.synced_generation = generation
+
+    def _apply(self, answers: dict, created_at: float = None, choices: list = ()):
+        minute = int((created_at or time.time()) // 60)
+        self.total += 1
+        for column, counter in self.answers.items():
+            counter[answers.get(column)] += 1
+        self.choices.update(choices)
+        self.minute_buckets[minute] += 1
+        self.hour_buckets[minute // 60] += 1
+
+    async def reconcile(self):
+        """Recharger l'état depuis la base et corriger une éventuelle dérive"""
+        self._pending = []
+        try:
+            snapshot = await run_db(_load_stats_snapshot)
+        except Exception:
+            self._pending = None
+            raise
+        pending, self._pending = self._pending, None
+        
+        previous_total = self.total
+        self.total = snapshot["total"]
+        self.answers = {column: snapshot["answers"][column] for column in STATS_TRACKED_QUESTIONS}
+        self.choices = snapshot["choices"]
+        self.minute_buckets = Counter()
+        self.hour_buckets = Counter()
+        for minute, count in snapshot["minutes"].items():
+            self.minute_buckets[minute] += count
+            self.hour_buckets[minute // 60] += count
+        self._prune(force=True)
+        
+        for response_id, answers, created_at, choices in pending:
+            if response_id and response_id > snapshot["max_id"]:
+                self._apply(answers, created_at, choices)
+        
+        self.synced_id = snapshot["max_id"]
+        self.max_id = max([snapshot["max_id"]] + [response_id or 0 for response_id, *_ in pending])
+        self._local_ids = {i for i in self._local_ids if i > self.synced_id}
+        
+        if self.ready:
+            self.last_drift = self.total - previous_total - len(pending)
+            if self.last_drift:
+                logger.warning("⚠️ Stats engine drift corrected: %+d responses", self.last_drift)
+        if not self.ready:
+            self.synced_generation = state_backend.get_counter(f"gen:{CACHE_TAG_RESPONSES}")
+        self.ready = True
+        self.last_reconcile = datetime.now()
+
+    def _prune(self, force: bool = False):
+        now_minute = int(time.time() // 60)
+        if not force and now_minute == self._last_prune_minute:
+            return
+        self._last_prune_minute = now_minute
+        min_minute = now_minute - self.MINUTE_WINDOW
+        for minute in [m for m in self.minute_buckets if m < min_minute]:
+            del self.minute_buckets[minute]
+        min_hour = now_minute // 60 - self.HOUR_WINDOW
+        for hour in [h for h in self.hour_buckets if h < min_hour]:
+            del self.hour_buckets[hour]
+
+    def _count_since_minutes(self, minutes: int) -> int:
+        since = int(time.time() // 60) - minutes
+        return sum(count for minute, count in self.minute_buckets.items() if minute >= since)
+
+    def _count_since_hours(self, hours: int) -> int:
+        since = int(time.time() // 3600) - hours
+        return sum(count for hour, count in self.hour_buckets.items() if hour >= since)
+
+    def progress_counts(self):
+        self._prune()
+        return self.total, self._count_since_minutes(self.MINUTE_WINDOW), self._count_since_minutes(60)
+
+    def _ranking(self, column: str, limit: int = None):
+        key = STATS_TRACKED_QUESTIONS[column]
+        return [{key: value, "count": count} for value, count in self.answers[column].most_common(limit)]
+
+    def detailed_stats(self) -> dict:
+        self._prune()
+        daily = Counter()
+        for hour, count in self.hour_buckets.items():
+            daily[datetime.fromtimestamp(hour * 3600).date()] += count
+        
+        return {
+            "total_responses": self.total,
+            "by_sector": self._ranking("question8", 20),
+            "smartphone_duration": self._ranking("question1"),
+            "daily_responses": [
+                {"date": day.isoformat(), "count": count}
+                for day, count in sorted(daily.items(), reverse=True)
+            ],
+            "performance": {
+                "last_hour": self._count_since_minutes(60),
+                "last_day": self._count_since_minutes(self.MINUTE_WINDOW),
+                "last_week": self._count_since_hours(self.HOUR_WINDOW)
+            },
+            "ia_definition": self._ranking("question9"),
+            "ia_investment_by_country": self._ranking("question12"),
+            "smartphone_usage": [{"choice": choice, "count": count} for choice, count in self.choices.most_common()]
+        }
+
+    def data_version(self, per_minute: bool = False) -> Optional[str]:
+        """Version des données (max id, total), plus la minute pour les fenêtres glissantes ; None si pas amorcé"""
+        if not self.ready:
+            return None
+        version = f"{self.max_id}-{self.total}"
+        return f"{version}-{int(time.time() // 60)}" if per_minute else version
+
+    def snapshot(self) -> dict:
+        return {
+            "ready": self.ready,
+            "total": self.total,
+            "max_id": self.max_id,
+            "last_reconcile": self.last_reconcile.isoformat() if self.last_reconcile else None,
+            "last_drift": self.last_drift,
+            "synced_id": self.synced_id,
+            "reconcile_interval_s": STATS_RECONCILE_INTERVAL
+        }
+
+stats_engine = StatsEngine()
+
+async def stats_reconcile_loop():
+    while True:
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL if stats_engine.ready else 10)
+        try:
+            await stats_engine.reconcile()
         except Exception as e:
-            logger.error(f"❌ Database initialization attempt {attempt + 1} failed: {str(e)}")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(2)
-            else:
-                if ENVIRONMENT == "production":
-                    raise
-                else:
-                    logger.warning("⚠️ Database initialization failed in dev mode - continuing anyway")
+            logger.error("❌ Stats reconciliation failed: %s", e)
+        try:
+            # Rattrape aussi les insertions faites hors de l'API
+            await dedup_prefilter.warm()
+        except Exception as e:
+            logger.error("❌ Duplicate prefilter warm-up failed: %s", e)
 
 # Rate limiting avec exemptions pour développeurs
-def rate_limit_check(request: Request):
+async def rate_limit_check(request: Request):
+    # Dépendance async : le limiteur en mémoire (non thread-safe) reste sur la boucle, SQLite passe par un thread
     if ENVIRONMENT == "development" or is_developer(request):
         return
         
-    client_ip = request.client.host
-    if rate_limiter.is_rate_limited(client_ip, RATE_LIMIT_PER_MINUTE):
+    client_ip = get_client_ip(request)
+    if await run_state(state_backend.rate_limit_hit, client_ip, RATE_LIMIT_PER_MINUTE):
         raise HTTPException(
             status_code=429,
             detail=f"Trop de requêtes. Limite: {RATE_LIMIT_PER_MINUTE} requêtes par minute."
         )
 
+# Requêtes conditionnelles (ETag / 304) sur les endpoints de lecture interrogés en boucle
+def not_modified(request: Request, response: Response, version: Optional[str], max_age: int):
+    """
+    Poser ETag et Cache-Control ; retourne une réponse 304 si le client a déjà cette version.
+    ETag faible : le corps varie selon la compression (GZipMiddleware)
+    """
+    response.headers["Cache-Control"] = f"public, max-age={max_age}"
+    if version is None:
+        return None
+    etag = f'W/"{version}"'
+    response.headers["ETag"] = etag
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in candidates or etag.removeprefix("W/") in candidates:
+            return Response(status_code=304, headers=dict(response.headers))
+    return None
+
+def no_store(response: Response):
+    """Corps d'erreur renvoyé en 200 : ni nginx (proxy_cache) ni le navigateur ne doivent le garder"""
+    response.headers["Cache-Control"] = "no-store"
+    del response.headers["ETag"]
+
 # === ENDPOINTS ===
 
-@app.get("/health")
-async def health_check():
-    """Endpoint de vérification de l'état du service"""
+def _ping_database(conn):
+    cursor = conn.cursor()
     try:
-        db_status = "unknown"
-        db_error = None
-        
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    finally:
+        cursor.close()
+
+class DatabaseHealthProbe:
+    """Ping de la base à intervalle fixe : /health, /health/ready et /monitoring lisent le dernier résultat"""
+
+    def __init__(self, interval_s: float, timeout_s: float, failure_threshold: int):
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self.failure_threshold = max(failure_threshold, 1)
+        self.status = "unknown"
+        self.last_check = None
+        self.last_success = None
+        self.last_error = None
+        self.latency_ms = None
+        self.avg_latency_ms = None
+        self.consecutive_failures = 0
+        self.checks = 0
+        self.failures = 0
+        self._checked_at = None
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval_s)
+
+    async def check(self):
+        start = time.perf_counter()
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            cursor.fetchone()
-            cursor.close()
-            conn.close()
-            db_status = "connected"
+            async with asyncio.timeout(self.timeout_s):
+                await run_db(_ping_database)
         except Exception as e:
-            db_status = "error"
-            db_error = str(e)
-            logger.error(f"Health check DB error: {e}")
-        
+            error = f"timeout after {self.timeout_s:g}s" if isinstance(e, TimeoutError) else str(e)
+            self._record_failure(error)
+        else:
+            self._record_success((time.perf_counter() - start) * 1000)
+        self.checks += 1
+        self.last_check = datetime.now()
+        self._checked_at = time.monotonic()
+
+    def _record_success(self, latency_ms: float):
+        if self.status != "connected" and self.checks:
+            logger.info("✅ Database reachable again after %s failed checks", self.consecutive_failures)
+        self.status = "connected"
+        self.latency_ms = round(latency_ms, 2)
+        # Moyenne glissante : un ping isolé lent ne fausse pas la tendance
+        self.avg_latency_ms = self.latency_ms if self.avg_latency_ms is None else round(0.8 * self.avg_latency_ms + 0.2 * latency_ms, 2)
+        self.consecutive_failures = 0
+        self.last_success = datetime.now()
+        self.last_error = None
+
+    def _record_failure(self, error: str):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        self.latency_ms = None
+        if self.consecutive_failures == self.failure_threshold:
+            logger.error("❌ Database health check failed %s times in a row: %s", self.consecutive_failures, error)
+        if self.consecutive_failures >= self.failure_threshold or self.status == "unknown":
+            self.status = "error"
+
+    @property
+    def ready(self) -> bool:
+        """Base joignable au dernier contrôle, et ce contrôle est récent (la sonde tourne toujours)"""
+        if self.status != "connected" or self._checked_at is None:
+            return False
+        return time.monotonic() - self._checked_at <= self.interval_s * 3 + self.timeout_s
+
+    def snapshot(self) -> dict:
         return {
-            "status": "healthy" if db_status == "connected" else "degraded",
-            "database": {
-                "status": db_status,
-                "error": db_error if db_status == "error" else None
-            },
-            "environment": ENVIRONMENT,
-            "pool_size": MAX_POOL_SIZE,
-            "target_responses": TARGET_RESPONSES,
-            "developer_mode": DEVELOPER_MODE,
+            "status": self.status,
+            "ready": self.ready,
+            "latency_ms": self.latency_ms,
+            "avg_latency_ms": self.avg_latency_ms,
+            "consecutive_failures": self.consecutive_failures,
+            "last_check": self.last_check.isoformat() if self.last_check else None,
+            "last_success": self.last_success.isoformat() if self.last_success else None,
+            "error": self.last_error,
+            "checks": self.checks,
+            "failures": self.failures,
+            "interval_s": self.interval_s
+        }
+
+health_probe = DatabaseHealthProbe(DB_HEALTH_INTERVAL_S, DB_HEALTH_TIMEOUT_S, DB_HEALTH_FAILURE_THRESHOLD)
+
+@app.get("/health")
+async def health_check():
+    """Endpoint de vérification de l'état du service (dernier résultat de la sonde, sans accès à la base)"""
+    database = health_probe.snapshot()
+    ready = database["ready"] and database_startup.schema_ready
+    return {
+        "status": "healthy" if ready else "degraded",
+        "database": database,
+        "startup": database_startup.snapshot(),
+        "environment": ENVIRONMENT,
+        "pool_size": MAX_POOL_SIZE,
+        "target_responses": TARGET_RESPONSES,
+        "developer_mode": DEVELOPER_MODE,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness : le process répond (la boucle d'événements n'est pas bloquée)"""
+    return {"status": "alive", "timestamp": datetime.now().isoformat()}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness : 503 tant que la base n'est pas joignable ou pas migrée (l'instance ne doit pas recevoir de trafic)"""
+    database = health_probe.snapshot()
+    ready = database["ready"] and database_startup.schema_ready
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        headers={"Cache-Control": "no-store"},
+        content={
+            "status": "ready" if ready else "not_ready",
+            "database": database,
+            "startup": database_startup.snapshot(),
             "timestamp": datetime.now().isoformat()
         }
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return JSONResponse(
-            status_code=503,
-            content={
-                "status": "error",
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            }
-        )
+    )
+
+def _fetch_total_count(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) as count FROM responses")
+        result = cursor.fetchone()
+        return result[0] if result else 0
+    finally:
+        cursor.close()
 
 @app.get("/count")
-async def get_count():
+async def get_count(request: Request, response: Response):
     """Endpoint optimisé pour le compteur temps réel du dashboard"""
     try:
+        await stats_engine.sync_shared()
+        unchanged = not_modified(request, response, stats_engine.data_version(), 2)
+        if unchanged:
+            return unchanged
+        if stats_engine.ready:
+            return {
+                "count": stats_engine.total,
+                "cached": True,
+                "timestamp": datetime.now().isoformat()
+            }
+        
         # Vérifier le cache d'abord
-        cached_count = get_from_simple_cache("total_count", ttl=3)
+        cached_count = response_cache.get("total_count")
         if cached_count is not None:
             return {
                 "count": cached_count,
@@ -521,19 +2629,10 @@ async def get_count():
                 "timestamp": datetime.now().isoformat()
             }
         
-        # Requête DB si pas en cache
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) as count FROM responses")
-        result = cursor.fetchone()
-        count = result[0] if result else 0
-        
-        cursor.close()
-        conn.close()
-        
-        # Cache pour 3 secondes
-        set_simple_cache("total_count", count, ttl=3)
+        # Requête DB si pas en cache (mise en cache pour 3 secondes)
+        count = await response_cache.compute(
+            "total_count", 3, partial(run_db, _fetch_total_count), tags=(CACHE_TAG_COUNT,)
+        )
         
         return {
             "count": count,
@@ -541,7 +2640,8 @@ async def get_count():
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
-        logger.error(f"Failed to get count: {str(e)}")
+        logger.error("Failed to get count: %s", e)
+        no_store(response)
         # Retourner 0 au lieu d'une erreur pour le dashboard
         return {
             "count": 0,
@@ -550,68 +2650,9 @@ async def get_count():
             "timestamp": datetime.now().isoformat()
         }
 
-@app.get("/responses/{response_id}")
-async def get_response_by_id(response_id: int):
-    """Récupérer une réponse spécifique par ID"""
-    try:
-        if response_id <= 0:
-            raise HTTPException(status_code=400, detail="ID de réponse invalide")
-        
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT 
-                id, question1, question2, question3, question4, question5,
-                question6, question7, question8, other_sector, question9,
-                question10, question11, question12, question13, question14,
-                question15, question16, created_at, updated_at
-            FROM responses 
-            WHERE id = %s
-        """, (response_id,))
-        
-        response = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if not response:
-            raise HTTPException(status_code=404, detail="Réponse non trouvée")
-        
-        # Traitement des données JSON et dates
-        if response['question4']:
-            try:
-                response['question4'] = json.loads(response['question4'])
-            except json.JSONDecodeError:
-                response['question4'] = []
-        
-        if response.get('created_at'):
-            response['created_at'] = response['created_at'].isoformat()
-        if response.get('updated_at'):
-            response['updated_at'] = response['updated_at'].isoformat()
-        
-        return {
-            "success": True,
-            "response": response,
-            "timestamp": datetime.now().isoformat()
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to fetch response {response_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail="Erreur lors de la récupération")
-
-@app.get("/progress")
-async def get_progress():
-    """Statistiques de progression avec cache"""
+def _fetch_progress_counts(conn):
+    cursor = conn.cursor()
     try:
-        # Vérifier le cache
-        cached_progress = get_from_simple_cache("progress_stats", ttl=10)
-        if cached_progress:
-            return cached_progress
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         cursor.execute("""
             SELECT 
                 COUNT(*) as total_responses,
@@ -619,33 +2660,47 @@ async def get_progress():
                 COUNT(CASE WHEN created_at >= DATE_SUB(NOW(), INTERVAL 1 HOUR) THEN 1 END) as responses_1h
             FROM responses
         """)
-        
         result = cursor.fetchone()
-        total_responses, responses_24h, responses_1h = result if result else (0, 0, 0)
-        
-        target = TARGET_RESPONSES
-        percentage = min((total_responses / target) * 100, 100) if target > 0 else 0
-        
+        return result if result else (0, 0, 0)
+    finally:
         cursor.close()
-        conn.close()
-        
-        progress_data = {
-            "total_responses": total_responses,
-            "target": target,
-            "percentage": round(percentage, 1),
-            "remaining": max(target - total_responses, 0),
-            "completed": total_responses >= target,
-            "responses_24h": responses_24h,
-            "responses_1h": responses_1h,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        # Cache pour 10 secondes
-        set_simple_cache("progress_stats", progress_data, ttl=10)
-        
-        return progress_data
+
+async def build_progress_data() -> dict:
+    await stats_engine.sync_shared()
+    if stats_engine.ready:
+        total_responses, responses_24h, responses_1h = stats_engine.progress_counts()
+    else:
+        # Requête DB mise en cache pour 10 secondes
+        total_responses, responses_24h, responses_1h = await response_cache.get_or_compute(
+            "progress_counts", 10, partial(run_db, _fetch_progress_counts), tags=(CACHE_TAG_COUNT,)
+        )
+    
+    target = TARGET_RESPONSES
+    percentage = min((total_responses / target) * 100, 100) if target > 0 else 0
+    
+    return {
+        "total_responses": total_responses,
+        "target": target,
+        "percentage": round(percentage, 1),
+        "remaining": max(target - total_responses, 0),
+        "completed": total_responses >= target,
+        "responses_24h": responses_24h,
+        "responses_1h": responses_1h,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/progress")
+async def get_progress(request: Request, response: Response):
+    """Statistiques de progression avec cache"""
+    try:
+        await stats_engine.sync_shared()
+        unchanged = not_modified(request, response, stats_engine.data_version(per_minute=True), 2)
+        if unchanged:
+            return unchanged
+        return await build_progress_data()
     except Exception as e:
-        logger.error(f"Failed to get progress: {str(e)}")
+        logger.error("Failed to get progress: %s", e)
+        no_store(response)
         # Retourner valeurs par défaut au lieu d'erreur
         return {
             "total_responses": 0,
@@ -659,58 +2714,445 @@ async def get_progress():
             "timestamp": datetime.now().isoformat()
         }
 
+# Progression en direct (Server-Sent Events) : un seul producteur calcule la progression,
+# chaque client abonné reçoit le même message via sa propre file bornée
+class ProgressBroadcaster:
+    """Diffusion de /progress aux tableaux de bord connectés, déclenchée par les soumissions"""
+
+    def __init__(self, heartbeat_s: float, tick_s: float, min_interval_ms: int, queue_max: int, max_clients: int):
+        self.heartbeat_s = heartbeat_s
+        # Plusieurs workers : les soumissions des autres process ne réveillent pas ce producteur
+        self.tick_s = tick_s
+        self.min_interval_s = min_interval_ms / 1000
+        self.queue_max = queue_max
+        self.max_clients = max_clients
+        self.subscribers = set()
+        self.latest = None
+        self.published = 0
+        self.dropped = 0
+        self._changed = None
+        self._task = None
+
+    def start(self):
+        self._changed = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def notify(self):
+        """Une soumission a été enregistrée : le producteur recalcule la progression"""
+        if self._changed:
+            self._changed.set()
+
+    def subscribe(self) -> asyncio.Queue:
+        if len(self.subscribers) >= self.max_clients:
+            raise HTTPException(status_code=503, detail="Trop de tableaux de bord connectés")
+        queue = asyncio.Queue(self.queue_max)
+        if self.latest:
+            # Affichage immédiat, sans attendre la prochaine soumission
+            queue.put_nowait(self.latest)
+        self.subscribers.add(queue)
+        self.notify()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def _publish(self, message: str):
+        for queue in self.subscribers:
+            if queue.full():
+                # Client lent : l'ancien état est remplacé, chaque message contient la progression complète
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(message)
+
+    async def _run(self):
+        last_total = None
+        last_sent = time.monotonic()
+        while True:
+            timeout = self.tick_s if state_backend.shared else self.heartbeat_s
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+                # Regrouper les soumissions d'une rafale en un seul message
+                await asyncio.sleep(self.min_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+            if not self.subscribers:
+                continue
+            
+            try:
+                progress = await build_progress_data()
+            except Exception as e:
+                logger.warning("⚠️ Progress stream update failed: %s", e)
+                progress = None
+            
+            if progress and (progress["total_responses"] != last_total or self.latest is None):
+                progress["delta"] = progress["total_responses"] - last_total if last_total is not None else 0
+                last_total = progress["total_responses"]
+                self.latest = f"event: progress\nid: {last_total}\ndata: {dumps_json(progress).decode()}\n\n"
+                self._publish(self.latest)
+                self.published += 1
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= self.heartbeat_s:
+                # Commentaire SSE : maintient la connexion ouverte à travers les proxys
+                self._publish(": ping\n\n")
+                last_sent = time.monotonic()
+
+    def snapshot(self) -> dict:
+        return {
+            "clients": len(self.subscribers),
+            "max_clients": self.max_clients,
+            "published": self.published,
+            "dropped": self.dropped,
+            "heartbeat_s": self.heartbeat_s
+        }
+
+progress_broadcaster = ProgressBroadcaster(
+    PROGRESS_STREAM_HEARTBEAT_S, PROGRESS_STREAM_TICK_S, PROGRESS_STREAM_MIN_INTERVAL_MS,
+    PROGRESS_STREAM_QUEUE_MAX, PROGRESS_STREAM_MAX_CLIENTS
+)
+
+async def _progress_events(queue: asyncio.Queue):
+    try:
+        # Délai de reconnexion automatique d'EventSource
+        yield "retry: 5000\n\n"
+        while True:
+            yield await queue.get()
+    finally:
+        progress_broadcaster.unsubscribe(queue)
+
+@app.get("/progress/stream")
+async def stream_progress():
+    """Progression en direct pour le tableau de bord (text/event-stream)"""
+    queue = progress_broadcaster.subscribe()
+    headers = {
+        "Cache-Control": "no-cache",
+        # Pas de mise en tampon nginx ni de compression : chaque événement part immédiatement
+        "X-Accel-Buffering": "no",
+        "Content-Encoding": "identity"
+    }
+    return StreamingResponse(_progress_events(queue), media_type="text/event-stream", headers=headers)
+
+# Recherche plein texte (questions 9, 10, 13, 14, 15 et 16)
+# Le texte indexé est normalisé ici plutôt que par l'analyseur InnoDB (pensé pour l'anglais) :
+# minuscules, accents retirés, élisions (l', d', qu'...) séparées, mots vides français ignorés.
+# La requête passe par la même normalisation, les deux côtés restent donc cohérents.
+SEARCH_TEXT_QUESTIONS = ("question9", "question10", "question13", "question14", "question15", "question16")
+SEARCH_MAX_TERMS = 10
+FRENCH_STOPWORDS = frozenset("""
+    a afin ai au aux avec avoir c ca ce ceci cela ces cet cette comme d dans de des du donc elle elles en
+    es est et etait ete etre eu il ils j je l la le les leur leurs lui m ma mais me meme mes moi mon n ne ni
+    nos notre nous on ont ou par pas peu plus pour qu quand que quel quelle quelles quels qui s sa sans se
+    ses si son sont sur t ta te tes toi ton tous tout toute toutes tres tu un une vos votre vous y
+""".split())
+_ELISION_RE = re.compile(r"\b(?:jusqu|lorsqu|puisqu|quoiqu|qu|[cdjlmnst])['’]")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def fold_text(text: str) -> str:
+    """Minuscules sans accents ni ligatures (« Élève » -> « eleve »)"""
+    text = text.lower().replace("œ", "oe").replace("æ", "ae")
+    return "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+
+def search_tokens(text: Optional[str]) -> list:
+    if not text:
+        return []
+    text = _ELISION_RE.sub(" ", fold_text(text))
+    return [
+        token for token in _TOKEN_RE.findall(text)
+        if len(token) >= SEARCH_MIN_TOKEN_SIZE and token not in FRENCH_STOPWORDS
+    ]
+
+def build_search_text(answers) -> str:
+    """Texte indexé d'une réponse : jetons normalisés des questions libres"""
+    return " ".join(token for value in answers for token in search_tokens(value))
+
+def boolean_search_query(q: str) -> Optional[str]:
+    """Requête MATCH ... IN BOOLEAN MODE : tous les mots requis, recherche par préfixe (pluriels, dérivés)"""
+    terms = list(dict.fromkeys(search_tokens(q)))[:SEARCH_MAX_TERMS]
+    return " ".join(f"+{term}*" for term in terms) or None
+
+INSERT_RESPONSE_COLUMNS = '''
+    INSERT INTO responses (
+        question1, question2, question3, question4, question5,
+        question6, question7, question8, other_sector, question9,
+        question10, question11, question12, question13, question14,
+        question15, question16, user_hash, browser_fingerprint,
+        submission_timestamp, user_agent, screen_resolution, search_text
+    )
+    VALUES '''
+INSERT_RESPONSE_ROW = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+INSERT_RESPONSE_QUERY = INSERT_RESPONSE_COLUMNS + INSERT_RESPONSE_ROW
+INSERT_CHOICE_QUERY = "INSERT IGNORE INTO response_question4 (response_id, choice) VALUES (%s, %s)"
+# Position de question4 (JSON) dans les valeurs d'INSERT_RESPONSE_QUERY
+QUESTION4_VALUE_INDEX = 3
+
+def _question4_choice_rows(response_id: int, values: tuple) -> list:
+    try:
+        choices = json.loads(values[QUESTION4_VALUE_INDEX] or "[]")
+    except json.JSONDecodeError:
+        return []
+    return [(response_id, str(choice)[:255]) for choice in dict.fromkeys(choices)]
+
+def _response_row(values: tuple) -> tuple:
+    """Valeurs d'INSERT_RESPONSE_QUERY : les réponses libres (dernier élément) deviennent search_text dans l'exécuteur DB"""
+    return (*values[:-1], build_search_text(values[-1]))
+
+def _insert_response(conn, values: tuple):
+    values = _response_row(values)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(INSERT_RESPONSE_QUERY, values)
+        response_id = cursor.lastrowid
+        # Même transaction : une réponse n'existe jamais sans ses choix
+        cursor.executemany(INSERT_CHOICE_QUERY, _question4_choice_rows(response_id, values))
+        conn.commit()
+        return response_id
+    finally:
+        cursor.close()
+
+def _insert_responses_batch(conn, rows: list):
+    """INSERT multi-lignes avec un seul commit (group commit), retourne l'id de la première ligne"""
+    rows = [_response_row(row) for row in rows]
+    cursor = conn.cursor()
+    try:
+        query = INSERT_RESPONSE_COLUMNS + ", ".join([INSERT_RESPONSE_ROW] * len(rows))
+        cursor.execute(query, [value for row in rows for value in row])
+        first_id = cursor.lastrowid
+        cursor.executemany(INSERT_CHOICE_QUERY, [
+            choice for offset, row in enumerate(rows) for choice in _question4_choice_rows(first_id + offset, row)
+        ])
+        try:
+            conn.commit()
+        except MySQLError as e:
+            raise BatchCommitError(msg=f"Batch commit failed: {e}", errno=getattr(e, "errno", None)) from e
+        return first_id
+    finally:
+        cursor.close()
+
+def _autoinc_lock_mode(conn) -> int:
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT @@innodb_autoinc_lock_mode")
+        return int(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+
+class IngestQueueFull(Exception):
+    pass
+
+class BatchCommitError(mysql.connector.OperationalError):
+    """Échec pendant le COMMIT d'un lot : il a pu être appliqué, le rejouer risquerait des doublons"""
+
+class BatchIngestPipeline:
+    """Ingestion write-behind : les soumissions validées sont mises en file et écrites par lots"""
+
+    def __init__(self, max_queue: int, batch_size: int, flush_ms: int):
+        self.max_queue = max_queue
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = max(flush_ms, 1) / 1000
+        self.queue = None
+        self._task = None
+        self.submitted = 0
+        self.rejected = 0
+        self.flushed_rows = 0
+        self.flushed_batches = 0
+        self.failed_batches = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.row_inserts = 0
+        self.autoinc_lock_mode = None
+
+    @property
+    def disabled(self) -> bool:
+        """Ids non consécutifs possibles : /submit repasse en insertion directe"""
+        return self.autoinc_lock_mode is not None and self.autoinc_lock_mode > 1
+
+    async def verify(self) -> bool:
+        """
+        Un INSERT multi-lignes n'obtient un bloc d'ids consécutifs qu'avec innodb_autoinc_lock_mode <= 1 ;
+        en mode 2 (entrelacé, défaut de MySQL 8) les ids d'un lot peuvent se mêler à ceux d'insertions concurrentes.
+        """
+        if self.autoinc_lock_mode is None:
+            self.autoinc_lock_mode = await run_db(_autoinc_lock_mode)
+            if self.disabled:
+                logger.warning("⚠️ innodb_autoinc_lock_mode=%s: batched ingest disabled, inserting rows one by one "
+                               "(start MySQL with --innodb-autoinc-lock-mode=1)", self.autoinc_lock_mode)
+        return not self.disabled
+
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self._task:
+            return
+        # Le marqueur de fin passe derrière les soumissions en attente : la file est vidée avant l'arrêt
+        await self.queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, values: tuple) -> int:
+        """Mettre une ligne en file et attendre son écriture durable, retourne l'id attribué"""
+        if self.queue is None:
+            raise RuntimeError("Ingest pipeline not started")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((values, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise IngestQueueFull()
+        self.submitted += 1
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            # Un lot part dès qu'il est plein ou que le délai de flush est écoulé
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _insert_rows(self, batch: list):
+        for values, future in batch:
+            self.row_inserts += 1
+            try:
+                self._resolve(future, await run_db(_insert_response, values))
+            except Exception as row_error:
+                self._resolve(future, error=row_error)
+
+    async def _flush(self, batch: list):
+        start = time.perf_counter()
+        try:
+            grouped = await self.verify()
+        except Exception:
+            # Base injoignable : les insertions ligne par ligne remontent l'erreur à chaque client
+            grouped = False
+        if not grouped:
+            await self._insert_rows(batch)
+            return
+        try:
+            first_id = await run_db(_insert_responses_batch, [values for values, _ in batch])
+        except Exception as e:
+            self.failed_batches += 1
+            logger.error("❌ Batch insert of %s rows failed: %s", len(batch), e)
+            if len(batch) == 1 or isinstance(e, BatchCommitError):
+                for _, future in batch:
+                    self._resolve(future, error=e)
+            else:
+                # Échec avant le COMMIT (rien n'est écrit) : isoler la ou les lignes fautives une par une
+                await self._insert_rows(batch)
+            return
+
+        # innodb_autoinc_lock_mode <= 1 (vérifié) : InnoDB réserve à ce « simple insert » un bloc d'ids consécutifs
+        for offset, (_, future) in enumerate(batch):
+            self._resolve(future, first_id + offset)
+
+        flush_ms = round((time.perf_counter() - start) * 1000, 2)
+        self.flushed_rows += len(batch)
+        self.flushed_batches += 1
+        self.last_batch_size = len(batch)
+        self.last_flush_ms = flush_ms
+        self.max_flush_ms = max(self.max_flush_ms, flush_ms)
+
+    @staticmethod
+    def _resolve(future, result=None, error=None):
+        # Le client a pu se déconnecter entre-temps
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def snapshot(self) -> dict:
+        return {
+            "mode": "direct" if self.disabled else "batched",
+            "autoinc_lock_mode": self.autoinc_lock_mode,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queue_max": self.max_queue,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "flushed_rows": self.flushed_rows,
+            "flushed_batches": self.flushed_batches,
+            "failed_batches": self.failed_batches,
+            "row_inserts": self.row_inserts,
+            "avg_batch_size": round(self.flushed_rows / self.flushed_batches, 2) if self.flushed_batches else 0,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": self.max_flush_ms
+        }
+
+ingest_pipeline = BatchIngestPipeline(INGEST_QUEUE_MAX, INGEST_BATCH_SIZE, INGEST_FLUSH_MS) if INGEST_MODE == "batched" else None
+
+async def _confirm_duplicate(user_hash: str, browser_fingerprint: str = None) -> bool:
+    dedup_prefilter.db_checks += 1
+    return await run_db(check_duplicate_submission, user_hash, browser_fingerprint)
+
 @app.post("/submit")
 async def submit_form(data: FormData, request: Request, _: None = Depends(rate_limit_check)):
     """Endpoint principal de soumission du questionnaire"""
     start_time = time.time()
-    client_ip = request.client.host
+    client_ip = get_client_ip(request)
     
-    logger.info(f"📥 Form submission from {client_ip}")
+    logger.info("📥 Form submission from %s", client_ip, extra={"sample": "submit_received"})
     
     user_hash = generate_user_hash(request)
     
     # Vérification des doublons (sauf développeurs)
     if not is_developer(request) and ENVIRONMENT == "production":
         try:
-            conn = get_db_connection()
-            if check_duplicate_submission(conn, user_hash, data.browser_fingerprint):
-                conn.close()
-                logger.warning(f"🚫 Duplicate submission from {client_ip}")
+            # Seuls les positifs probables du préfiltre sont confirmés en base
+            if not await run_state(dedup_prefilter.definitely_new, user_hash, data.browser_fingerprint) \
+                    and await _confirm_duplicate(user_hash, data.browser_fingerprint):
+                dedup_prefilter.rejected += 1
+                logger.warning("🚫 Duplicate submission from %s", client_ip)
                 raise HTTPException(
                     status_code=409, 
                     detail="Vous avez déjà soumis ce questionnaire aujourd'hui. Merci pour votre participation !"
                 )
-            conn.close()
         except HTTPException:
             raise
         except Exception as e:
-            logger.error(f"Error checking duplicates: {str(e)}")
+            logger.error("Error checking duplicates: %s", e)
     else:
-        logger.info(f"🔧 Skipping duplicate check for {client_ip} (dev mode)")
+        logger.info("🔧 Skipping duplicate check for %s (dev mode)", client_ip, extra={"sample": "dedup_skipped"})
     
     # Insertion des données avec gestion d'erreurs robuste
-    conn = None
-    cursor = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         # Préparation des données
         question4_value = json.dumps(data.question4, ensure_ascii=False)
         question8_value = data.other_sector if data.question8 == "Autre" and data.other_sector else data.question8
         
-        logger.debug(f"💾 Inserting data for user_hash={user_hash[:8]}...")
-        
-        insert_query = '''
-            INSERT INTO responses (
-                question1, question2, question3, question4, question5,
-                question6, question7, question8, other_sector, question9,
-                question10, question11, question12, question13, question14,
-                question15, question16, user_hash, browser_fingerprint,
-                submission_timestamp, user_agent, screen_resolution
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        '''
+        logger.debug("💾 Inserting data for user_hash=%s...", user_hash[:8])
         
         values = (
             data.question1, data.question2, data.question3, question4_value,
@@ -718,20 +3160,39 @@ async def submit_form(data: FormData, request: Request, _: None = Depends(rate_l
             data.other_sector, data.question9, data.question10, data.question11,
             data.question12, data.question13, data.question14, data.question15,
             data.question16, user_hash, data.browser_fingerprint,
-            data.submission_timestamp, data.user_agent, data.screen_resolution
+            data.submission_timestamp, data.user_agent, data.screen_resolution,
+            # Texte indexé construit avec l'INSERT, hors de la boucle d'événements (normalisation ~100 µs)
+            tuple(getattr(data, question) for question in SEARCH_TEXT_QUESTIONS)
         )
         
-        cursor.execute(insert_query, values)
-        conn.commit()
-        
-        response_id = cursor.lastrowid
+        if ingest_pipeline and not ingest_pipeline.disabled:
+            response_id = await ingest_pipeline.submit(values)
+        else:
+            response_id = await run_db(_insert_response, values)
         
-        # Vider les caches après insertion réussie
-        clear_simple_cache()
+        # Réponse enregistrée : un échec des mises à jour dérivées ne doit pas devenir une 500
+        # (le client réessaierait et recevrait 409) ; stats et cache se rattrapent à la réconciliation / au TTL
+        try:
+            await run_state(dedup_prefilter.remember, user_hash, data.browser_fingerprint)
+            stats_engine.record(response_id, {
+                "question1": data.question1,
+                "question8": question8_value,
+                "question9": data.question9,
+                "question12": data.question12,
+            }, choices=data.question4)
+            
+            # Invalider uniquement les données dérivées de la table (le cache reste servi au plus CACHE_MIN_REFRESH_MS)
+            generations = await run_state(
+                response_cache.invalidate, CACHE_TAG_COUNT, CACHE_TAG_AGGREGATES, CACHE_TAG_LATEST, CACHE_TAG_RESPONSES
+            )
+            stats_engine.note_local_write(generations.get(CACHE_TAG_RESPONSES))
+            progress_broadcaster.notify()
+        except Exception as e:
+            logger.error("❌ Post-insert update failed for ID %s: %s", response_id, e)
         
         processing_time = round((time.time() - start_time) * 1000, 2)
         dev_status = " [DEV]" if is_developer(request) else ""
-        logger.info(f"✅ Data inserted{dev_status} - ID: {response_id} - {processing_time}ms")
+        logger.info("✅ Data inserted%s - ID: %s - %sms", dev_status, response_id, processing_time, extra={"sample": "submit_stored"})
         
         return {
             "success": True,
@@ -742,87 +3203,244 @@ async def submit_form(data: FormData, request: Request, _: None = Depends(rate_l
             "processing_time_ms": processing_time
         }
         
+    except IngestQueueFull:
+        logger.warning("🚫 Ingest queue full (%s) - rejecting submission from %s", INGEST_QUEUE_MAX, client_ip)
+        raise HTTPException(status_code=503, detail="Service momentanément saturé, veuillez réessayer dans quelques instants.")
     except mysql.connector.IntegrityError as err:
-        logger.error(f"❌ Database integrity error: {str(err)}")
+        logger.error("❌ Database integrity error: %s", err)
         if "Duplicate entry" in str(err) or "idx_unique_submission" in str(err):
             raise HTTPException(status_code=409, detail="Vous avez déjà soumis ce questionnaire aujourd'hui.")
         else:
             raise HTTPException(status_code=500, detail="Erreur lors de l'enregistrement")
     except MySQLError as err:
-        logger.error(f"❌ Database insertion failed: {str(err)}")
+        logger.error("❌ Database insertion failed: %s", err)
         raise HTTPException(status_code=500, detail="Erreur lors de l'enregistrement")
+    except DatabaseBusy:
+        raise
     except Exception as e:
-        logger.error(f"❌ Unexpected error: {str(e)}")
+        logger.error("❌ Unexpected error: %s", e)
         raise HTTPException(status_code=500, detail="Erreur interne du serveur")
 
+RESPONSE_COLUMNS = """
+                id, question1, question2, question3, question4, question5,
+                question6, question7, question8, other_sector, question9,
+                question10, question11, question12, question13, question14,
+                question15, question16, created_at, updated_at"""
+
+def encode_cursor(created_at: datetime, response_id: int) -> str:
+    """Curseur opaque encodant la position (created_at, id) de la dernière ligne lue"""
+    payload = json.dumps([created_at.isoformat(), response_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str) -> tuple:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, response_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(response_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _parse_filter_date(value: str, name: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Date invalide pour {name} (format attendu YYYY-MM-DD)")
+
+def build_response_filters(
+    sector: Optional[str] = None,
+    smartphone_duration: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    match: str = "exact",
+    question4_choice: Optional[str] = None
+):
+    """
+    Clause WHERE utilisable par les index : égalité (ou préfixe) sur question8 / question1,
+    intervalle semi-ouvert sur created_at plutôt que DATE(created_at)
+    """
+    where_conditions = []
+    params = []
+    
+    for column, value in (("question8", sector), ("question1", smartphone_duration)):
+        if not value:
+            continue
+        if match == "prefix":
+            where_conditions.append(f"{column} LIKE %s")
+            params.append(_escape_like(value) + "%")
+        else:
+            where_conditions.append(f"{column} = %s")
+            params.append(value)
+    
+    if question4_choice:
+        # Semi-jointure sur idx_choice_response : pas de lecture du JSON
+        where_conditions.append("id IN (SELECT response_id FROM response_question4 WHERE choice = %s)")
+        params.append(question4_choice)
+    
+    if date_from:
+        where_conditions.append("created_at >= %s")
+        params.append(_parse_filter_date(date_from, "date_from"))
+    
+    if date_to:
+        # Jour de fin inclus : avant minuit le lendemain
+        where_conditions.append("created_at < %s")
+        params.append(_parse_filter_date(date_to, "date_to") + timedelta(days=1))
+    
+    where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+    return where_clause, params
+
+def encode_rank_cursor(rank: int, response_id: int) -> str:
+    """Curseur de la recherche plein texte : position (pertinence arrondie, id) de la dernière ligne lue"""
+    payload = json.dumps([rank, response_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_rank_cursor(token: str) -> tuple:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        rank, response_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(rank), int(response_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+SEARCH_MATCH = "MATCH(search_text) AGAINST (%s IN BOOLEAN MODE)"
+# Tri et curseur sur la pertinence arrondie en entier (score x 10^6) : comparée exactement des deux côtés,
+# alors qu'un flottant relu depuis le curseur JSON peut différer du score recalculé et sauter ou répéter des lignes
+SEARCH_RANK = f"CAST(ROUND({SEARCH_MATCH} * 1000000) AS SIGNED)"
+
+def _fetch_responses_ranked(conn, where_clause: str, params: list, search_query: str, limit: int, after: tuple = None, skip: int = 0):
+    """Page triée par pertinence décroissante puis id (index FULLTEXT, jamais de LIKE '%...%')"""
+    query_params = [search_query, search_query, *params, search_query]
+    query = f"""
+            SELECT {RESPONSE_COLUMNS}, {SEARCH_MATCH} AS relevance, {SEARCH_RANK} AS relevance_rank
+            FROM responses 
+            WHERE {where_clause} AND {SEARCH_MATCH}"""
+    if after:
+        query += """
+            HAVING relevance_rank < %s OR (relevance_rank = %s AND id < %s)"""
+        query_params.extend([after[0], after[0], after[1]])
+    query += """
+            ORDER BY relevance_rank DESC, id DESC 
+            LIMIT %s"""
+    query_params.append(limit + 1)
+    if skip and not after:
+        query += " OFFSET %s"
+        query_params.append(skip)
+    
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(query, query_params)
+        responses = cursor.fetchall()
+    finally:
+        cursor.close()
+    
+    has_more = len(responses) > limit
+    responses = responses[:limit]
+    next_cursor = encode_rank_cursor(responses[-1]['relevance_rank'], responses[-1]['id']) if has_more else None
+    for response in responses:
+        del response['relevance_rank']
+    return responses, has_more, next_cursor
+
+def _fetch_responses_keyset(conn, where_clause: str, params: list, limit: int, after: tuple = None, skip: int = 0):
+    """Page triée par (created_at, id) décroissants ; après un curseur, aucune ligne n'est relue (pas d'OFFSET)"""
+    conditions = [where_clause]
+    query_params = list(params)
+    if after:
+        conditions.append("(created_at < %s OR (created_at = %s AND id < %s))")
+        query_params.extend([after[0], after[0], after[1]])
+    
+    query = f"""
+            SELECT {RESPONSE_COLUMNS}
+            FROM responses 
+            WHERE {" AND ".join(conditions)}
+            ORDER BY created_at DESC, id DESC 
+            LIMIT %s"""
+    # Une ligne de plus que demandé pour savoir s'il reste une page
+    query_params.append(limit + 1)
+    if skip and not after:
+        query += " OFFSET %s"
+        query_params.append(skip)
+    
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(query, query_params)
+        responses = cursor.fetchall()
+    finally:
+        cursor.close()
+    
+    has_more = len(responses) > limit
+    responses = responses[:limit]
+    next_cursor = encode_cursor(responses[-1]['created_at'], responses[-1]['id']) if has_more else None
+    return responses, has_more, next_cursor
+
+def _count_responses(conn, where_clause: str, params: list):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM responses WHERE {where_clause}", params)
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+async def count_responses_cached(where_clause: str = "1=1", params: list = ()):
+    """Total des lignes filtrées, servi par le moteur de stats ou le cache plutôt qu'un COUNT(*) par page"""
+    if where_clause == "1=1" and stats_engine.ready:
+        return stats_engine.total
+    key = f"total:{where_clause}:{json.dumps(list(params), default=str)}"
+    return await response_cache.get_or_compute(
+        key, 30, partial(run_db, _count_responses, where_clause, list(params)), tags=(CACHE_TAG_COUNT,)
+    )
+
+def serialize_response_rows(responses: list) -> list:
+    """
+    question4 est déjà du JSON valide (colonne JSON) : inséré tel quel dans la sortie, sans json.loads.
+    Les dates sont sérialisées par orjson : à renvoyer via json_response()
+    """
+    for response in responses:
+        if response.get('question4'):
+            response['question4'] = orjson.Fragment(response['question4'])
+    return responses
+
 @app.get("/responses")
 async def get_all_responses(
-    skip: int = Query(0, ge=0, description="Nombre d'éléments à ignorer"),
-    limit: int = Query(100, ge=1, le=1000, description="Nombre maximum d'éléments à retourner")
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0, description="Nombre d'éléments à ignorer (préférer after)"),
+    limit: int = Query(100, ge=1, le=1000, description="Nombre maximum d'éléments à retourner"),
+    after: Optional[str] = Query(None, description="Curseur next_cursor de la page précédente"),
+    include_total: bool = Query(True, description="Inclure le nombre total de réponses")
 ):
     """
-    Endpoint pour récupérer toutes les réponses avec pagination
+    Endpoint pour récupérer toutes les réponses avec pagination par curseur
     """
+    position = decode_cursor(after) if after else None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        await stats_engine.sync_shared()
+        unchanged = not_modified(request, response, stats_engine.data_version(), 5)
+        if unchanged:
+            return unchanged
+        responses, has_more, next_cursor = await run_db(_fetch_responses_keyset, "1=1", [], limit, position, skip)
+        total = await count_responses_cached() if include_total else None
         
-        # Requête optimisée avec pagination
-        cursor.execute("""
-            SELECT 
-                id, question1, question2, question3, question4, question5,
-                question6, question7, question8, other_sector, question9,
-                question10, question11, question12, question13, question14,
-                question15, question16, created_at, updated_at
-            FROM responses 
-            ORDER BY created_at DESC 
-            LIMIT %s OFFSET %s
-        """, (limit, skip))
-        responses = cursor.fetchall()
-        
-        cursor.execute("SELECT COUNT(*) as total FROM responses")
-        total = cursor.fetchone()['total']
-        
-        # Traitement des données JSON et dates
-        for response in responses:
-            if response['question4']:
-                try:
-                    response['question4'] = json.loads(response['question4'])
-                except json.JSONDecodeError:
-                    response['question4'] = []
-            
-            if response.get('created_at'):
-                response['created_at'] = response['created_at'].isoformat()
-            if response.get('updated_at'):
-                response['updated_at'] = response['updated_at'].isoformat()
-        
-        cursor.close()
-        conn.close()
-        
-        return {
+        return json_response({
             "success": True,
-            "responses": responses,
+            "responses": serialize_response_rows(responses),
             "total": total,
-            "skip": skip,
+            "skip": 0 if after else skip,
             "limit": limit,
-            "has_more": skip + limit < total,
-            "timestamp": datetime.now().isoformat()
-        }
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+            "timestamp": datetime.now()
+        }, response)
+    except DatabaseBusy:
+        raise
     except Exception as e:
-        logger.error(f"Failed to fetch responses: {str(e)}")
+        logger.error("Failed to fetch responses: %s", e)
         raise HTTPException(status_code=500, detail="Erreur lors de la récupération")
 
-@app.get("/stats")
-async def get_detailed_stats():
+def _compute_detailed_stats(conn):
+    cursor = conn.cursor(dictionary=True)
     try:
-        # Vérifier le cache d'abord
-        cached_stats = get_from_cache("detailed_stats")
-        if cached_stats:
-            return cached_stats
-        
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
         stats = {}
         
         # Statistiques générales
@@ -856,14 +3474,7 @@ async def get_detailed_stats():
             GROUP BY DATE(created_at) 
             ORDER BY date DESC
         """)
-        daily_responses = cursor.fetchall()
-        
-        # Conversion des dates
-        for item in daily_responses:
-            if item['date']:
-                item['date'] = item['date'].isoformat()
-        
-        stats['daily_responses'] = daily_responses
+        stats['daily_responses'] = cursor.fetchall()
         
         # Statistiques de performance
         cursor.execute("""
@@ -893,28 +3504,46 @@ async def get_detailed_stats():
         """)
         stats['ia_investment_by_country'] = cursor.fetchall()
         
-        cursor.close()
-        conn.close()
-        
-        stats['timestamp'] = datetime.now().isoformat()
-        
-        # Mettre en cache pour 30 secondes
-        set_cache("detailed_stats", stats, ttl=30)
+        # Usages du smartphone (question4, choix multiples)
+        cursor.execute("""
+            SELECT choice, COUNT(*) as count 
+            FROM response_question4 
+            GROUP BY choice 
+            ORDER BY count DESC
+        """)
+        stats['smartphone_usage'] = cursor.fetchall()
         
         return stats
+    finally:
+        cursor.close()
+
+async def _build_detailed_stats():
+    await stats_engine.sync_shared()
+    if stats_engine.ready:
+        stats = stats_engine.detailed_stats()
+    else:
+        stats = await run_db(_compute_detailed_stats)
+    stats['timestamp'] = datetime.now().isoformat()
+    return stats
+
+@app.get("/stats")
+async def get_detailed_stats(request: Request, response: Response):
+    try:
+        await stats_engine.sync_shared()
+        # Corps JSON + gzip mis en cache pour 30 secondes, un seul calcul pour les requêtes concurrentes
+        return await cached_json_response(
+            request, response, "detailed_stats", 30, _build_detailed_stats, tags=(CACHE_TAG_COUNT, CACHE_TAG_AGGREGATES),
+            version=partial(stats_engine.data_version, per_minute=True), max_age=10
+        )
+    except DatabaseBusy:
+        raise
     except Exception as e:
-        logger.error(f"Failed to generate stats: {str(e)}")
+        logger.error("Failed to generate stats: %s", e)
         raise HTTPException(status_code=500, detail="Erreur lors de la génération des statistiques")
 
-@app.get("/responses/latest")
-async def get_latest_responses(limit: int = Query(10, ge=1, le=50, description="Nombre de réponses récentes")):
-    """
-    Endpoint pour récupérer les dernières réponses soumises
-    """
+def _fetch_latest_responses(conn, limit: int):
+    cursor = conn.cursor(dictionary=True)
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
         cursor.execute("""
             SELECT 
                 id, question1, question8, created_at
@@ -923,206 +3552,503 @@ async def get_latest_responses(limit: int = Query(10, ge=1, le=50, description="
             LIMIT %s
         """, (limit,))
         responses = cursor.fetchall()
-        
+    finally:
         cursor.close()
-        conn.close()
-        
-        # Conversion des dates
-        for response in responses:
-            if response.get('created_at'):
-                response['created_at'] = response['created_at'].isoformat()
-        
-        return {
-            "success": True,
-            "latest_responses": responses,
-            "count": len(responses),
-            "timestamp": datetime.now().isoformat()
-        }
+    
+    return {
+        "success": True,
+        "latest_responses": responses,
+        "count": len(responses),
+        "timestamp": datetime.now()
+    }
+
+@app.get("/responses/latest")
+async def get_latest_responses(
+    request: Request,
+    response: Response,
+    limit: int = Query(10, ge=1, le=50, description="Nombre de réponses récentes")
+):
+    """
+    Endpoint pour récupérer les dernières réponses soumises
+    """
+    try:
+        await stats_engine.sync_shared()
+        return await cached_json_response(
+            request, response, f"latest:{limit}", 10, partial(run_db, _fetch_latest_responses, limit), tags=(CACHE_TAG_LATEST,),
+            version=stats_engine.data_version, max_age=5
+        )
+    except DatabaseBusy:
+        raise
     except Exception as e:
-        logger.error(f"Failed to fetch latest responses: {str(e)}")
+        logger.error("Failed to fetch latest responses: %s", e)
         raise HTTPException(status_code=500, detail="Erreur lors de la récupération des dernières réponses")
 
 @app.get("/responses/search")
 async def search_responses(
+    q: Optional[str] = Query(None, max_length=200, description="Recherche plein texte dans les réponses libres (triée par pertinence)"),
     sector: Optional[str] = Query(None, description="Filtrer par secteur d'activité"),
     smartphone_duration: Optional[str] = Query(None, description="Filtrer par durée de possession du smartphone"),
     date_from: Optional[str] = Query(None, description="Date de début (YYYY-MM-DD)"),
-    date_to: Optional[str] = Query(None, description="Date de fin (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Date de fin incluse (YYYY-MM-DD)"),
+    match: str = Query("exact", pattern="^(exact|prefix)$", description="Secteur / durée : valeur exacte ou préfixe"),
+    question4_choice: Optional[str] = Query(None, description="Répondants ayant coché ce choix à la question 4"),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=500)
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[str] = Query(None, description="Curseur next_cursor de la page précédente"),
+    include_total: bool = Query(True, description="Inclure le nombre total de résultats")
 ):
     """
     Endpoint pour rechercher et filtrer les réponses
+    Avec q : recherche plein texte (questions 9, 10, 13 à 16) triée par pertinence
     """
+    search_query = boolean_search_query(q) if q else None
+    if q and not search_query:
+        raise HTTPException(status_code=400, detail="Recherche vide : mots trop courts ou trop courants")
+    if after:
+        position = decode_rank_cursor(after) if search_query else decode_cursor(after)
+    else:
+        position = None
+    where_clause, params = build_response_filters(sector, smartphone_duration, date_from, date_to, match, question4_choice)
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Construction de la requête dynamique
-        where_conditions = []
-        params = []
-        
-        if sector:
-            where_conditions.append("question8 LIKE %s")
-            params.append(f"%{sector}%")
-        
-        if smartphone_duration:
-            where_conditions.append("question1 = %s")
-            params.append(smartphone_duration)
-        
-        if date_from:
-            where_conditions.append("DATE(created_at) >= %s")
-            params.append(date_from)
-        
-        if date_to:
-            where_conditions.append("DATE(created_at) <= %s")
-            params.append(date_to)
-        
-        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-        
-        # Requête pour compter le total
-        count_query = f"SELECT COUNT(*) as total FROM responses WHERE {where_clause}"
-        cursor.execute(count_query, params)
-        total = cursor.fetchone()['total']
-        
-        # Requête pour les données avec pagination
-        data_query = f"""
-            SELECT 
-                id, question1, question2, question3, question4, question5,
-                question6, question7, question8, other_sector, question9,
-                question10, question11, question12, question13, question14,
-                question15, question16, created_at, updated_at
-            FROM responses 
-            WHERE {where_clause}
-            ORDER BY created_at DESC 
-            LIMIT %s OFFSET %s
-        """
-        
-        params.extend([limit, skip])
-        cursor.execute(data_query, params)
-        responses = cursor.fetchall()
-        
-        # Traitement des données
-        for response in responses:
-            if response['question4']:
-                try:
-                    response['question4'] = json.loads(response['question4'])
-                except json.JSONDecodeError:
-                    response['question4'] = []
-            
-            if response.get('created_at'):
-                response['created_at'] = response['created_at'].isoformat()
-            if response.get('updated_at'):
-                response['updated_at'] = response['updated_at'].isoformat()
-        
-        cursor.close()
-        conn.close()
+        if search_query:
+            responses, has_more, next_cursor = await run_db(
+                _fetch_responses_ranked, where_clause, params, search_query, limit, position, skip
+            )
+            where_clause = f"{where_clause} AND {SEARCH_MATCH}"
+            params = [*params, search_query]
+        else:
+            responses, has_more, next_cursor = await run_db(
+                _fetch_responses_keyset, where_clause, params, limit, position, skip
+            )
+        total = await count_responses_cached(where_clause, params) if include_total else None
         
-        return {
+        return json_response({
             "success": True,
-            "responses": responses,
+            "responses": serialize_response_rows(responses),
             "total": total,
-            "skip": skip,
+            "skip": 0 if after else skip,
             "limit": limit,
-            "has_more": skip + limit < total,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
             "filters": {
+                "q": q,
                 "sector": sector,
                 "smartphone_duration": smartphone_duration,
                 "date_from": date_from,
-                "date_to": date_to
+                "date_to": date_to,
+                "match": match,
+                "question4_choice": question4_choice
             },
-            "timestamp": datetime.now().isoformat()
-        }
+            "timestamp": datetime.now()
+        })
+    except DatabaseBusy:
+        raise
     except Exception as e:
-        logger.error(f"Failed to search responses: {str(e)}")
+        logger.error("Failed to search responses: %s", e)
         raise HTTPException(status_code=500, detail="Erreur lors de la recherche")
 
+def _fetch_response_by_id(conn, response_id: int):
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"""
+            SELECT {RESPONSE_COLUMNS}
+            FROM responses 
+            WHERE id = %s
+        """, (response_id,))
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+@app.get("/responses/{response_id}")
+async def get_response_by_id(response_id: int):
+    """Récupérer une réponse spécifique par ID"""
+    try:
+        if response_id <= 0:
+            raise HTTPException(status_code=400, detail="ID de réponse invalide")
+        
+        response = await run_db(_fetch_response_by_id, response_id)
+        
+        if not response:
+            raise HTTPException(status_code=404, detail="Réponse non trouvée")
+        
+        return json_response({
+            "success": True,
+            "response": serialize_response_rows([response])[0],
+            "timestamp": datetime.now()
+        })
+    except HTTPException:
+        raise
+    except DatabaseBusy:
+        raise
+    except Exception as e:
+        logger.error("Failed to fetch response %s: %s", response_id, e)
+        raise HTTPException(status_code=500, detail="Erreur lors de la récupération")
+
+EXPORT_COLUMNS = [
+    "id", "question1", "question2", "question3", "question4", "question5",
+    "question6", "question7", "question8", "other_sector", "question9",
+    "question10", "question11", "question12", "question13", "question14",
+    "question15", "question16", "created_at"
+]
+
+class ExportStream:
+    """Lecture d'un export par paquets sur un curseur serveur non bufferisé (mémoire constante)"""
+
+    def __init__(self, query: str, params: list, chunk_rows: int = EXPORT_CHUNK_ROWS):
+        self.query = query
+        self.params = params
+        self.chunk_rows = chunk_rows
+        self.conn = None
+        self.cursor = None
+        self.exhausted = False
+        self.closed = False
+        # Un fetchmany annulé côté boucle continue dans son thread : _close attend qu'il ait fini
+        self._lock = threading.Lock()
+
+    def _open(self):
+        self.conn = get_db_connection()
+        start = time.perf_counter()
+        try:
+            self.cursor = self.conn.cursor(buffered=False)
+            self.cursor.execute(self.query, self.params)
+        except Exception:
+            release_db_connection(self.conn)
+            raise
+        db_query_duration.observe(time.perf_counter() - start, "export_stream")
+
+    def _fetch(self):
+        with self._lock:
+            rows = self.cursor.fetchmany(self.chunk_rows)
+            if not rows:
+                self.exhausted = True
+            return rows
+
+    def _close(self):
+        with self._lock:
+            if not self.exhausted:
+                # Export interrompu (client déconnecté) : connexion fermée plutôt que vidée du reste du résultat
+                release_db_connection(self.conn, broken=True)
+                return
+            broken = False
+            try:
+                self.cursor.close()
+            except Exception as e:
+                logger.warning("⚠️ Error closing export cursor: %s", e)
+                broken = True
+            finally:
+                release_db_connection(self.conn, broken)
+
+    async def open(self):
+        """Lancer la requête : les erreurs surviennent avant l'envoi du premier octet"""
+        # Le jeton du pool est gardé pendant tout l'export, comme la connexion
+        await connection_pool.admit()
+        try:
+            await run_in_db_executor(self._open)
+        except BaseException:
+            self.closed = True
+            connection_pool.dismiss()
+            raise
+
+    async def chunks(self):
+        while not self.exhausted:
+            rows = await run_in_db_executor(self._fetch)
+            if rows:
+                yield rows
+
+    async def close(self):
+        """
+        Rendre la connexion et le jeton ; sans effet au second appel.
+        Appelé par le corps de la réponse (finally) et par sa tâche de fond, qui s'exécute aussi
+        quand le client se déconnecte avant que le corps ait commencé ou pendant un envoi
+        """
+        if self.closed:
+            return
+        self.closed = True
+        future = _submit_to_db_executor(self._close)
+        # Jeton rendu quand le thread a fini, même si l'attente est annulée
+        future.add_done_callback(lambda _: connection_pool.dismiss())
+        await asyncio.shield(future)
+
+def build_export_query(
+    sector: Optional[str],
+    smartphone_duration: Optional[str],
+    date_from: Optional[str],
+    date_to: Optional[str],
+    match: str,
+    question4_choice: Optional[str]
+):
+    """Requête d'export filtrée, commune aux exports CSV et colonnaires"""
+    where_clause, params = build_response_filters(sector, smartphone_duration, date_from, date_to, match, question4_choice)
+    
+    query = f"""
+        SELECT {", ".join(EXPORT_COLUMNS)}
+        FROM responses 
+        WHERE {where_clause}
+        ORDER BY created_at DESC, id DESC
+    """
+    return query, params
+
+def _csv_value(column: str, value):
+    if value is None:
+        return ""
+    if column == "question4":
+        # Convertir question4 (JSON) en string
+        try:
+            choices = json.loads(value)
+        except json.JSONDecodeError:
+            return ""
+        return "; ".join(choices) if isinstance(choices, list) else str(choices)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+async def _csv_body(stream: ExportStream, compress: bool):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    def encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        # Z_SYNC_FLUSH : chaque paquet part immédiatement au lieu d'attendre la fin du flux
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH) if compressor else data
+    
+    try:
+        # BOM pour qu'Excel détecte l'UTF-8, puis l'en-tête avant la première ligne
+        writer.writerow(EXPORT_COLUMNS)
+        yield encode("\ufeff" + buffer.getvalue())
+        
+        async for rows in stream.chunks():
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([_csv_value(column, value) for column, value in zip(EXPORT_COLUMNS, row)] for row in rows)
+            yield encode(buffer.getvalue())
+        
+        if compressor:
+            yield compressor.flush()
+    finally:
+        await stream.close()
+
 @app.get("/export/csv")
 async def export_responses_csv(
+    request: Request,
     sector: Optional[str] = Query(None),
+    smartphone_duration: Optional[str] = Query(None),
     date_from: Optional[str] = Query(None),
-    date_to: Optional[str] = Query(None)
+    date_to: Optional[str] = Query(None),
+    match: str = Query("exact", pattern="^(exact|prefix)$"),
+    question4_choice: Optional[str] = Query(None)
 ):
     """
-    Endpoint pour exporter les réponses en format CSV
+    Endpoint pour exporter les réponses en format CSV (flux continu, sans limite de lignes)
     """
+    query, params = build_export_query(sector, smartphone_duration, date_from, date_to, match, question4_choice)
+    
+    stream = ExportStream(query, params)
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Construction de la requête avec filtres
-        where_conditions = []
-        params = []
-        
-        if sector:
-            where_conditions.append("question8 LIKE %s")
-            params.append(f"%{sector}%")
-        
-        if date_from:
-            where_conditions.append("DATE(created_at) >= %s")
-            params.append(date_from)
-        
-        if date_to:
-            where_conditions.append("DATE(created_at) <= %s")
-            params.append(date_to)
-        
-        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-        
-        query = f"""
-            SELECT 
-                id, question1, question2, question3, question4, question5,
-                question6, question7, question8, other_sector, question9,
-                question10, question11, question12, question13, question14,
-                question15, question16, created_at
-            FROM responses 
-            WHERE {where_clause}
-            ORDER BY created_at DESC
-            LIMIT 10000
-        """
-        
-        cursor.execute(query, params)
-        responses = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
-        
-        # Traitement pour CSV
-        csv_data = []
-        for response in responses:
-            # Convertir question4 (JSON) en string
-            if response['question4']:
-                try:
-                    q4_data = json.loads(response['question4'])
-                    response['question4'] = '; '.join(q4_data) if isinstance(q4_data, list) else str(q4_data)
-                except json.JSONDecodeError:
-                    response['question4'] = ''
-            
-            # Convertir les dates
-            if response.get('created_at'):
-                response['created_at'] = response['created_at'].isoformat()
-            
-            csv_data.append(response)
-        
-        return {
-            "success": True,
-            "data": csv_data,
-            "count": len(csv_data),
-            "headers": [
-                "id", "question1", "question2", "question3", "question4", "question5",
-                "question6", "question7", "question8", "other_sector", "question9",
-                "question10", "question11", "question12", "question13", "question14",
-                "question15", "question16", "created_at"
-            ],
-            "filters": {
-                "sector": sector,
-                "date_from": date_from,
-                "date_to": date_to
-            },
-            "timestamp": datetime.now().isoformat()
-        }
+        await stream.open()
+    except DatabaseBusy:
+        raise
     except Exception as e:
-        logger.error(f"Failed to export CSV: {str(e)}")
+        logger.error("Failed to export CSV: %s", e)
         raise HTTPException(status_code=500, detail="Erreur lors de l'export CSV")
+    
+    # Compression à la volée si le client l'accepte (le GZipMiddleware laisse passer un flux déjà encodé)
+    compress = "gzip" in request.headers.get("accept-encoding", "").lower()
+    headers = {
+        "Content-Disposition": f'attachment; filename="responses_{datetime.now():%Y%m%d_%H%M%S}.csv"',
+        "Vary": "Accept-Encoding"
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(
+        _csv_body(stream, compress), media_type="text/csv; charset=utf-8", headers=headers,
+        background=BackgroundTask(stream.close)
+    )
+
+# Export colonnaire pour l'analyse (pandas / polars / duckdb) : types conservés, pas de re-parsing
+EXPORT_FREE_TEXT_COLUMNS = {"other_sector", "question15", "question16"}
+EXPORT_COLUMNAR_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+@lru_cache(maxsize=1)
+def _export_arrow_schema():
+    """Schéma Arrow de l'export : choix fermés encodés en dictionnaire, question4 en liste, vrai timestamp"""
+    categorical = pa.dictionary(pa.int32(), pa.string())
+    fields = []
+    for column in EXPORT_COLUMNS:
+        if column == "id":
+            field_type = pa.int64()
+        elif column == "question4":
+            field_type = pa.list_(pa.string())
+        elif column == "created_at":
+            field_type = pa.timestamp("s")
+        elif column in EXPORT_FREE_TEXT_COLUMNS:
+            field_type = pa.string()
+        else:
+            field_type = categorical
+        fields.append(pa.field(column, field_type, nullable=column != "id"))
+    return pa.schema(fields)
+
+def _question4_list(value):
+    if value is None:
+        return None
+    try:
+        choices = json.loads(value)
+    except json.JSONDecodeError:
+        return None
+    return [str(choice) for choice in choices] if isinstance(choices, list) else [str(choices)]
+
+def _arrow_record_batch(rows: list):
+    """Paquet de lignes du curseur -> RecordBatch typé"""
+    schema = _export_arrow_schema()
+    columns = list(zip(*rows))
+    arrays = []
+    for index, field in enumerate(schema):
+        values = columns[index]
+        if field.name == "question4":
+            values = [_question4_list(value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+class _ChunkSink(io.RawIOBase):
+    """Sortie en écriture seule vidée après chaque lot : le fichier part au fil de l'eau"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        # Position absolue : Parquet s'en sert pour les offsets du footer
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def _write_columnar_batch(writer, sink: _ChunkSink, rows: list) -> bytes:
+    """Construire, encoder (Parquet ou Arrow IPC) et vider un lot, hors de la boucle d'événements"""
+    writer.write_batch(_arrow_record_batch(rows))
+    return sink.drain()
+
+async def _columnar_body(stream: ExportStream, export_format: str):
+    schema = _export_arrow_schema()
+    sink = _ChunkSink()
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    
+    try:
+        try:
+            async for rows in stream.chunks():
+                data = await asyncio.to_thread(_write_columnar_batch, writer, sink, rows)
+                if data:
+                    yield data
+        finally:
+            writer.close()
+        # Footer Parquet / marqueur de fin de flux Arrow
+        yield sink.drain()
+    finally:
+        await stream.close()
+
+@app.get("/export/{export_format}")
+async def export_responses_columnar(
+    export_format: str,
+    sector: Optional[str] = Query(None),
+    smartphone_duration: Optional[str] = Query(None),
+    date_from: Optional[str] = Query(None),
+    date_to: Optional[str] = Query(None),
+    match: str = Query("exact", pattern="^(exact|prefix)$"),
+    question4_choice: Optional[str] = Query(None)
+):
+    """
+    Endpoint pour exporter les réponses en format colonnaire (parquet ou arrow), mêmes filtres que l'export CSV
+    """
+    if export_format not in EXPORT_COLUMNAR_FORMATS:
+        raise HTTPException(status_code=404, detail="Format d'export inconnu")
+    if pa is None:
+        raise HTTPException(status_code=501, detail="Export colonnaire indisponible (pyarrow non installé)")
+    
+    query, params = build_export_query(sector, smartphone_duration, date_from, date_to, match, question4_choice)
+    
+    stream = ExportStream(query, params, chunk_rows=EXPORT_COLUMNAR_BATCH_ROWS)
+    try:
+        await stream.open()
+    except DatabaseBusy:
+        raise
+    except Exception as e:
+        logger.error("Failed to export %s: %s", export_format, e)
+        raise HTTPException(status_code=500, detail="Erreur lors de l'export")
+    
+    media_type, extension = EXPORT_COLUMNAR_FORMATS[export_format]
+    headers = {
+        "Content-Disposition": f'attachment; filename="responses_{datetime.now():%Y%m%d_%H%M%S}.{extension}"',
+        # Déjà compressé (zstd / binaire) : le GZipMiddleware ne doit pas le re-encoder
+        "Content-Encoding": "identity"
+    }
+    return StreamingResponse(
+        _columnar_body(stream, export_format), media_type=media_type, headers=headers,
+        background=BackgroundTask(stream.close)
+    )
+
+@metrics.collector
+def _component_metrics():
+    cache = response_cache.snapshot()
+    yield "cache_hits_total", "counter", "Lectures du cache servies", cache["hits"]
+    yield "cache_misses_total", "counter", "Lectures du cache manquées", cache["misses"]
+    yield "cache_hit_ratio", "gauge", "Taux de succès du cache depuis le démarrage", cache["hit_ratio"]
+    yield "cache_entries", "gauge", "Entrées en cache", cache["size"]
+    yield "cache_evictions_total", "counter", "Entrées évincées (LRU)", cache["evictions"]
+    
+    rate_limiting = state_backend.snapshot()
+    yield "rate_limit_rejections_total", "counter", "Requêtes refusées par le rate limiting (429)", rate_limiting.get("rejected", 0)
+    yield "rate_limit_active_keys", "gauge", "Clients suivis par le rate limiting", rate_limiting.get("active_keys", 0)
+    
+    dedup = dedup_prefilter.snapshot()
+    yield "dedup_rejections_total", "counter", "Soumissions refusées comme doublons (409)", dedup["rejected"]
+    yield "dedup_db_checks_total", "counter", "Vérifications de doublon faites en base", dedup["db_checks"]
+    yield "dedup_skipped_db_checks_total", "counter", "Vérifications de doublon évitées par le préfiltre", dedup["skipped_db_checks"]
+    
+    pool = connection_pool.snapshot()
+    yield "db_pool_max_size", "gauge", "Taille maximale du pool de connexions", pool["max_size"]
+    yield "db_pool_open_connections", "gauge", "Connexions ouvertes par le pool", pool["open"]
+    yield "db_pool_idle_connections", "gauge", "Connexions inactives dans le pool", pool["idle"]
+    yield "db_pool_waiting", "gauge", "Requêtes en attente d'une connexion", pool["waiting"]
+    yield "db_pool_opened_total", "counter", "Connexions ouvertes depuis le démarrage", pool["opened"]
+    yield "db_pool_closed_total", "counter", "Connexions fermées (inactivité, erreur, ping échoué)", pool["closed"]
+    yield "db_pool_pings_total", "counter", "Vérifications de connexions inactives", pool["pings"]
+    yield "log_queue_depth", "gauge", "Enregistrements de log en attente d'écriture", log_queue_handler.queue.qsize()
+    yield "log_records_dropped_total", "counter", "Enregistrements de log perdus (file pleine)", log_queue_handler.dropped
+    yield "log_records_sampled_out_total", "counter", "Enregistrements INFO écartés par l'échantillonnage", log_sampler.dropped
+    yield "db_schema_version", "gauge", "Version du schéma appliquée (0 tant que les migrations n'ont pas abouti)", database_startup.schema_version or 0
+    yield "db_up", "gauge", "Base joignable au dernier contrôle de la sonde de santé", int(health_probe.ready)
+    yield "db_health_latency_ms", "gauge", "Latence moyenne du ping de la sonde de santé", health_probe.avg_latency_ms or 0
+    yield "db_health_failures_total", "counter", "Contrôles de santé en échec", health_probe.failures
+    yield "stats_engine_ready", "gauge", "Moteur de statistiques amorcé", int(stats_engine.ready)
+    yield "responses_total", "gauge", "Réponses enregistrées (moteur de statistiques)", stats_engine.total
+    yield "progress_stream_clients", "gauge", "Tableaux de bord connectés au flux SSE", len(progress_broadcaster.subscribers)
+    if ingest_pipeline:
+        ingest = ingest_pipeline.snapshot()
+        yield "ingest_queue_depth", "gauge", "Soumissions en attente d'insertion groupée", ingest.get("queue_depth", 0)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Métriques au format texte Prometheus"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/monitoring")
 async def get_monitoring_info():
@@ -1131,46 +4057,14 @@ async def get_monitoring_info():
     """
     try:
         # Informations sur le pool de connexions
-        active_connections = 0
-        pool_status = "unknown"
-        
-        if connection_pool:
-            try:
-                # Estimation du nombre de connexions actives
-                active_connections = MAX_POOL_SIZE - connection_pool._cnx_pool.qsize()
-                pool_status = "healthy"
-            except Exception as e:
-                pool_status = f"error: {str(e)}"
+        pool = connection_pool.snapshot()
+        # Connexions empruntées, comptées à l'emprunt et au retour
+        active_connections = int(db_connections_in_use.value())
+        pool_status = "saturated" if pool["waiting"] else "healthy"
         
-        # Test de connexion à la base de données
-        db_status = "unknown"
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            cursor.fetchone()
-            cursor.close()
-            conn.close()
-            db_status = "connected"
-        except Exception as e:
-            db_status = f"error: {str(e)}"
-        
-        # Statut Redis
-        redis_status = "disabled"
-        if redis_client:
-            try:
-                redis_client.ping()
-                redis_status = "connected"
-            except Exception as e:
-                redis_status = f"error: {str(e)}"
-        
-        # Statistiques des caches
-        cache_stats = {
-            "stats_cache_size": len(stats_cache),
-            "count_cache_size": len(count_cache),
-            "stats_cache_hits": getattr(stats_cache, 'hits', 0),
-            "stats_cache_misses": getattr(stats_cache, 'misses', 0)
-        }
+        # Dernier résultat de la sonde de santé (pas de connexion empruntée par appel)
+        health = health_probe.snapshot()
+        db_status = health["status"] if health["error"] is None else f"{health['status']}: {health['error']}"
         
         return {
             "status": "operational",
@@ -1178,15 +4072,26 @@ async def get_monitoring_info():
                 "status": db_status,
                 "active_connections": active_connections,
                 "max_connections": MAX_POOL_SIZE,
-                "pool_status": pool_status
+                "pool_status": pool_status,
+                "pool": pool,
+                "health": health,
+                "startup": database_startup.snapshot()
             },
-            "redis": {
-                "status": redis_status
+            "cache": response_cache.snapshot(),
+            "ingest": ingest_pipeline.snapshot() if ingest_pipeline else {"mode": "direct"},
+            "stats_engine": stats_engine.snapshot(),
+            "dedup": dedup_prefilter.snapshot(),
+            "progress_stream": progress_broadcaster.snapshot(),
+            "slow_queries": slow_query_log.snapshot(),
+            "logging": {
+                "format": LOG_FORMAT,
+                "queue_depth": log_queue_handler.queue.qsize(),
+                "dropped": log_queue_handler.dropped,
+                "sampled_out": log_sampler.dropped
             },
-            "cache": cache_stats,
             "rate_limiting": {
                 "limit_per_minute": RATE_LIMIT_PER_MINUTE,
-                "active_ips": len(rate_limiter.requests)
+                **state_backend.snapshot()
             },
             "configuration": {
                 "target_responses": TARGET_RESPONSES,
@@ -1196,7 +4101,7 @@ async def get_monitoring_info():
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
-        logger.error(f"Monitoring failed: {str(e)}")
+        logger.error("Monitoring failed: %s", e)
         return {
             "status": "error", 
             "message": str(e),
@@ -1209,33 +4114,59 @@ async def clear_cache():
     Endpoint admin pour vider les caches
     """
     try:
-        # Vider les caches en mémoire
-        stats_cache.clear()
-        count_cache.clear()
-        
-        # Vider Redis si disponible
-        cache_cleared = {"memory": True, "redis": False}
-        if redis_client:
-            try:
-                redis_client.flushdb()
-                cache_cleared["redis"] = True
-            except Exception as e:
-                logger.warning(f"Failed to clear Redis cache: {e}")
+        # Vider le cache en mémoire
+        cleared_entries = response_cache.snapshot()["size"]
+        response_cache.clear()
         
         return {
             "success": True,
             "message": "Cache vidé avec succès",
-            "cleared": cache_cleared,
+            "cleared": {"memory": True, "entries": cleared_entries},
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
-        logger.error(f"Failed to clear cache: {str(e)}")
+        logger.error("Failed to clear cache: %s", e)
         raise HTTPException(status_code=500, detail="Erreur lors du vidage du cache")
 
+@app.get("/admin/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    sort: str = Query("total", pattern="^(total|avg|max|slow)$")
+):
+    """
+    Empreintes de requêtes SQL les plus coûteuses, avec le plan EXPLAIN capturé pour chaque forme de paramètres lente
+    """
+    return {
+        "settings": slow_query_log.snapshot(),
+        "sort": sort,
+        "queries": slow_query_log.top(limit, sort),
+        "timestamp": datetime.now()
+    }
+
+@app.post("/admin/slow-queries/reset")
+async def reset_slow_queries():
+    """Remettre à zéro les statistiques du journal des requêtes lentes"""
+    slow_query_log.reset()
+    return {"success": True, "timestamp": datetime.now()}
+
 # Gestion des erreurs globales
+@app.exception_handler(DatabaseBusy)
+async def database_busy_handler(request: Request, exc: DatabaseBusy):
+    logger.warning("🚦 Database busy on %s: %s", request.url.path, exc)
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": "1"},
+        content={
+            "success": False,
+            "error": "Service momentanément saturé",
+            "message": "Service momentanément saturé, veuillez réessayer dans quelques instants.",
+            "timestamp": datetime.now().isoformat()
+        }
+    )
+
 @app.exception_handler(MySQLError)
 async def mysql_exception_handler(request: Request, exc: MySQLError):
-    logger.error(f"MySQL Error: {str(exc)}")
+    logger.error("MySQL Error: %s", exc)
     return JSONResponse(
         status_code=500,
         content={
@@ -1248,7 +4179,7 @@ async def mysql_exception_handler(request: Request, exc: MySQLError):
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
     return JSONResponse(
         status_code=500,
         content={
@@ -1263,12 +4194,13 @@ if __name__ == "__main__":
     import uvicorn
     
     # Configuration optimisée pour la production
+    # Plusieurs workers : STATE_BACKEND=sqlite pour partager rate limiting et invalidation du cache
     uvicorn.run(
-        app, 
+        "main:app" if WEB_CONCURRENCY > 1 else app, 
         host="0.0.0.0", 
         port=8000, 
         log_level="info",
-        workers=1,  # Une seule instance avec pool de connexions
+        workers=WEB_CONCURRENCY,  # Chaque worker a son propre pool de connexions
         access_log=True,
         server_header=False,  # Sécurité
         date_header=False     # Sécurité
@@ -0,0 +1,293 @@
+"""
+Microbenchmarks du chemin critique de /submit (sans base de données)
+
+Mesure isolément le coût CPU de chaque étape exécutée avant l'INSERT :
+validation FormData (validators, comptage de mots, dédoublonnage de question4),
+get_client_ip / is_developer / generate_user_hash / rate_limit_check sur une requête
+Starlette, build_search_text (exécuté avec l'INSERT, dans l'exécuteur DB), ainsi que les primitives
+cache / limiteur / préfiltre. is_developer est mesuré avec DEVELOPER_MODE actif (en production il retourne
+immédiatement) ; les adresses de test ne sont pas des adresses de développeur.
+
+Chaque mesure est le meilleur de --repeat séries (timeit, nombre d'appels calibré),
+sur --rounds passages entrelacés de toute la suite : le minimum est le plus stable d'une
+exécution à l'autre, et une rafale de charge sur la machine ne touche qu'un passage.
+
+Référence : perf/baseline_hot_path.json (versionnée) est comparée à chaque exécution,
+à titre indicatif : elle ne vaut que pour la machine qui l'a produite (python / architecture /
+hôte enregistrés dans le fichier) ; ailleurs, les écarts sont affichés sans signaler de régression
+ni échouer. Pour vérifier une modification, enregistrer une référence
+sur sa machine au commit de départ (--save), puis comparer avec --baseline : le script
+échoue si un benchmark ralentit de plus de --max-regression.
+
+Seuil de régression : 25 % sur le meilleur temps (min_ns), au-dessus du bruit observé
+d'une exécution à l'autre (jusqu'à ~20 % avec 5 passages sur une machine partagée) ;
+il signale les vrais changements de coût (appel DB / SQLite ajouté, parcours O(n), etc.).
+
+Usage (depuis backend/) :
+    python perf/bench_hot_path.py [--filter user_hash] [--repeat 10] [--json]
+    python perf/bench_hot_path.py --save /tmp/before.json
+    python perf/bench_hot_path.py --baseline /tmp/before.json [--max-regression 0.25]
+    python perf/bench_hot_path.py --save perf/baseline_hot_path.json    # mettre à jour la référence versionnée
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+
+os.environ.setdefault("LOG_TO_FILE", "false")
+os.environ.setdefault("ENVIRONMENT", "production")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.requests import Request  # noqa: E402
+
+import main  # noqa: E402
+from main import (  # noqa: E402
+    SEARCH_TEXT_QUESTIONS, DedupPrefilter, FormData, InProcessStateBackend, SlidingWindowRateLimit, TTLCache,
+    build_search_text, generate_user_hash, get_client_ip, is_developer, rate_limit_check,
+)
+
+FREE_TEXT = "L'intelligence artificielle va transformer la santé et l'éducation dans notre pays si les données sont protégées"
+PAYLOAD = {
+    "question1": "Entre 1 et 3 ans", "question2": "Les 2", "question3": "50% loisirs et 50% professionnel",
+    "question4": [
+        "Consulter les mails et messages (SMS)", "Consulter les réseaux sociaux (professionnels ou personnels)",
+        "Regarder des vidéos (YouTube, Netflix, Prime Video, ...)",
+    ],
+    "question5": "Entre 1h et 3h", "question6": "Moins d'1h", "question7": "Moins d'1h",
+    "question8": "Éducation (Enseignement pré-scolaire, primaire, secondaire, ...)", "other_sector": None,
+    "question9": "Des technologies qui reposent sur l'utilisation d'algorithmes visant à simuler l'intelligence humaine",
+    "question10": "L'informatique, l'électronique, les mathématiques, les neurosciences et les sciences cognitives",
+    "question11": "1950", "question12": "Les États-Unis", "question13": "Des mégadonnées, des données massives",
+    "question14": "La protection de la vie privée et la propriété intellectuelle",
+    "question15": FREE_TEXT, "question16": FREE_TEXT,
+    "browser_fingerprint": "a3f1c9e2b7d04f18", "submission_timestamp": "2024-03-01T08:30:00.000Z",
+    "user_agent": "Mozilla/5.0 (Linux; Android 14) AppleWebKit/537.36 Chrome/124.0 Mobile Safari/537.36",
+    "screen_resolution": "412x915",
+}
+CLIENT_COUNT = 50_000
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_hot_path.json")
+MAX_REGRESSION = 0.25
+# Les adresses reviennent en boucle : limite relevée pour mesurer le cas nominal (pas de 429)
+main.RATE_LIMIT_PER_MINUTE = 10**9
+# Sinon is_developer se réduit à `return False` (ENVIRONMENT=production)
+main.DEVELOPER_MODE = True
+
+
+def client_ips(count: int) -> list:
+    return [f"198.{18 + i // 65536 % 2}.{i // 256 % 256}.{i % 256}" for i in range(count)]
+
+
+def make_request(client_ip: str) -> Request:
+    """Requête telle que vue derrière nginx : pair de confiance + X-Forwarded-For"""
+    return Request({
+        "type": "http", "method": "POST", "path": "/submit", "query_string": b"",
+        "client": ("172.18.0.5", 40000),
+        "headers": [
+            (b"user-agent", PAYLOAD["user_agent"].encode()),
+            (b"x-forwarded-for", client_ip.encode()),
+            (b"content-type", b"application/json"),
+        ],
+    })
+
+
+def run_sync(coroutine):
+    """Exécuter une coroutine qui ne suspend jamais (backend d'état en mémoire : run_state appelle directement)"""
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    coroutine.close()
+    raise RuntimeError("la coroutine a été suspendue")
+
+
+def cycling(items: list):
+    """Fonction sans argument renvoyant l'élément suivant, en boucle"""
+    state = {"i": 0}
+    size = len(items)
+
+    def next_item():
+        state["i"] = (state["i"] + 1) % size
+        return items[state["i"]]
+    return next_item
+
+
+def bench_form_validation():
+    return lambda: FormData(**PAYLOAD)
+
+
+def bench_form_validation_duplicates():
+    payload = {**PAYLOAD, "question4": PAYLOAD["question4"] * 3}
+    return lambda: FormData(**payload)
+
+
+def bench_client_ip():
+    next_ip = cycling(client_ips(CLIENT_COUNT))
+    return lambda: get_client_ip(make_request(next_ip()))
+
+
+def bench_is_developer():
+    next_ip = cycling(client_ips(CLIENT_COUNT))
+    return lambda: is_developer(make_request(next_ip()))
+
+
+def bench_user_hash():
+    next_ip = cycling(client_ips(CLIENT_COUNT))
+    return lambda: generate_user_hash(make_request(next_ip()))
+
+
+def bench_rate_limit_check():
+    next_ip = cycling(client_ips(CLIENT_COUNT))
+    return lambda: run_sync(rate_limit_check(make_request(next_ip())))
+
+
+def bench_search_text():
+    data = FormData(**PAYLOAD)
+    return lambda: build_search_text(getattr(data, question) for question in SEARCH_TEXT_QUESTIONS)
+
+
+def bench_submit_pre_insert():
+    """Enchaînement de /submit sur la boucle avant l'INSERT : limite, validation, identité (is_developer deux fois), hash"""
+    next_ip = cycling(client_ips(CLIENT_COUNT))
+
+    def run():
+        request = make_request(next_ip())
+        run_sync(rate_limit_check(request))
+        FormData(**PAYLOAD)
+        get_client_ip(request)
+        generate_user_hash(request)
+        is_developer(request)
+        is_developer(request)
+    return run
+
+
+def bench_rate_limiter_existing_key():
+    limiter = SlidingWindowRateLimit()
+    next_ip = cycling(client_ips(CLIENT_COUNT))
+    return lambda: limiter.is_rate_limited(next_ip(), 10**9)
+
+
+def bench_cache_hit():
+    cache = TTLCache(InProcessStateBackend())
+    cache.set("stats", {"total": 1}, ttl=3600, tags=("aggregates",))
+    return lambda: cache.get("stats")
+
+
+def bench_cache_miss():
+    cache = TTLCache(InProcessStateBackend())
+    return lambda: cache.get("absent")
+
+
+def bench_cache_set():
+    cache = TTLCache(InProcessStateBackend(), max_entries=256)
+    next_key = cycling([f"responses:{i}" for i in range(1024)])
+    return lambda: cache.set(next_key(), b"{}", ttl=60, tags=("responses",))
+
+
+def bench_dedup_prefilter():
+    prefilter = DedupPrefilter()
+    prefilter.ready = True
+    hashes = [f"{i:064x}" for i in range(CLIENT_COUNT)]
+    for user_hash in hashes[::2]:
+        prefilter.remember(user_hash, None)
+    next_hash = cycling(hashes)
+    return lambda: prefilter.definitely_new(next_hash(), PAYLOAD["browser_fingerprint"])
+
+
+BENCHMARKS = {
+    "form_validation": bench_form_validation,
+    "form_validation_question4_duplicates": bench_form_validation_duplicates,
+    "get_client_ip": bench_client_ip,
+    "is_developer": bench_is_developer,
+    "generate_user_hash": bench_user_hash,
+    "rate_limit_check": bench_rate_limit_check,
+    "build_search_text": bench_search_text,
+    "submit_pre_insert": bench_submit_pre_insert,
+    "rate_limiter_existing_key": bench_rate_limiter_existing_key,
+    "cache_hit": bench_cache_hit,
+    "cache_miss": bench_cache_miss,
+    "cache_set": bench_cache_set,
+    "dedup_prefilter": bench_dedup_prefilter,
+}
+
+
+def measure(func, repeat: int, min_time: float) -> tuple:
+    """Durées par appel (ns) de chaque série, et nombre total d'appels"""
+    timer = timeit.Timer(func)
+    # Nombre d'appels par série calibré pour durer au moins min_time
+    number, elapsed = timer.autorange()
+    number = max(int(number * min_time / elapsed), 1) if elapsed < min_time else number
+    return [total / number * 1e9 for total in timer.repeat(repeat=repeat, number=number)], number * repeat
+
+
+def summarize(runs: list, calls: int) -> dict:
+    return {"min_ns": round(min(runs), 1), "median_ns": round(statistics.median(runs), 1), "calls": calls}
+
+
+def compare(results: dict, baseline_path: str, max_regression: float) -> int:
+    with open(baseline_path, encoding="utf-8") as f:
+        reference = json.load(f)
+    baseline = reference["benchmarks"]
+    comparable = (reference.get("python"), reference.get("machine"), reference.get("host")) == \
+        (platform.python_version(), platform.machine(), platform.node())
+    if not comparable:
+        print(f"référence produite avec python {reference.get('python')} / {reference.get('machine')} "
+              f"sur {reference.get('host')} : écarts indicatifs, aucune régression signalée")
+    regressions = 0
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            print(f"{name:38} (nouveau)")
+            continue
+        ratio = result["min_ns"] / before["min_ns"] - 1
+        regressed = comparable and ratio > max_regression
+        regressions += regressed
+        print(f"{name:38} {before['min_ns']:10.0f} -> {result['min_ns']:10.0f} ns ({ratio:+.0%}){'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filter", default="", help="ne lancer que les benchmarks dont le nom contient ce texte")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5, help="passages entrelacés de toute la suite")
+    parser.add_argument("--min-time", type=float, default=0.05, help="durée minimale d'une série (secondes)")
+    parser.add_argument("--json", action="store_true", help="résultats JSON sur stdout")
+    parser.add_argument("--save", help="enregistrer les résultats comme référence")
+    parser.add_argument("--baseline", help="référence à comparer, échec au-delà de --max-regression "
+                                           "(sans cette option : comparaison indicative à perf/baseline_hot_path.json)")
+    parser.add_argument("--max-regression", type=float, default=MAX_REGRESSION, help="ralentissement toléré avec --baseline")
+    args = parser.parse_args()
+
+    selected = {name: factory() for name, factory in BENCHMARKS.items() if args.filter in name}
+    runs = {name: [] for name in selected}
+    calls = dict.fromkeys(selected, 0)
+    for _ in range(max(args.rounds, 1)):
+        for name, func in selected.items():
+            round_runs, round_calls = measure(func, args.repeat, args.min_time)
+            runs[name] += round_runs
+            calls[name] += round_calls
+    results = {name: summarize(runs[name], calls[name]) for name in selected}
+    if not args.json:
+        for name, result in results.items():
+            print(f"{name:38} {result['min_ns']:10.0f} ns/call (médiane {result['median_ns']:.0f})")
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "host": platform.node(),
+              "benchmarks": results}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if args.baseline:
+        sys.exit(1 if compare(results, args.baseline, args.max_regression) else 0)
+    if not args.json and not args.save and os.path.exists(DEFAULT_BASELINE):
+        print(f"\ncomparaison à {os.path.relpath(DEFAULT_BASELINE)} (indicative) :")
+        compare(results, DEFAULT_BASELINE, args.max_regression)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark du limiteur de débit (SlidingWindowRateLimit)
+
+Mesure le coût par appel de is_rate_limited() avec 100 000 clés distinctes
+actives, ainsi que la mémoire occupée par l'état du limiteur.
+
+Usage (depuis backend/) :
+    python perf/bench_rate_limiter.py [--keys 100000] [--calls 500000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("LOG_TO_FILE", "false")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import SlidingWindowRateLimit  # noqa: E402
+
+
+def fake_ips(count: int):
+    return [f"{10 + i // 16777216}.{(i // 65536) % 256}.{(i // 256) % 256}.{i % 256}" for i in range(count)]
+
+
+def per_call_ns(limiter, keys, calls: int) -> float:
+    start = time.perf_counter_ns()
+    for key in keys[:calls]:
+        limiter.is_rate_limited(key, 30)
+    return (time.perf_counter_ns() - start) / min(calls, len(keys))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--calls", type=int, default=500_000)
+    args = parser.parse_args()
+
+    ips = fake_ips(args.keys)
+    limiter = SlidingWindowRateLimit()
+    insert_ns = per_call_ns(limiter, ips, args.keys)
+
+    # Mémoire mesurée sur un limiteur séparé (tracemalloc fausse les temps)
+    tracemalloc.start()
+    measured = SlidingWindowRateLimit()
+    per_call_ns(measured, ips, args.keys)
+    memory_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del measured
+
+    # Trafic réaliste : appels aléatoires sur des clés déjà connues
+    random.seed(42)
+    traffic = [random.choice(ips) for _ in range(args.calls)]
+    hit_ns = per_call_ns(limiter, traffic, args.calls)
+
+    # Une seule clé très sollicitée (rejets après la limite)
+    hot_ns = per_call_ns(limiter, [ips[0]] * args.calls, args.calls)
+
+    print(f"keys={args.keys} calls={args.calls}")
+    print(f"new key        : {insert_ns:8.0f} ns/call")
+    print(f"existing key   : {hit_ns:8.0f} ns/call")
+    print(f"hot key        : {hot_ns:8.0f} ns/call")
+    print(f"limiter memory : {memory_bytes / args.keys:8.0f} bytes/key ({memory_bytes / 1_048_576:.1f} MiB)")
+    print(f"active keys    : {limiter.active_keys}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark de la sérialisation d'une page /responses
+
+Compare, pour une page de 1000 lignes telles que renvoyées par mysql-connector :
+- avant : json.loads de question4 + isoformat des dates, jsonable_encoder de FastAPI,
+  rendu JSONResponse (json.dumps), puis compression par le GZipMiddleware ;
+- après : question4 inséré tel quel (orjson.Fragment), dates natives, rendu orjson direct ;
+- corps pré-compressé en cache (/stats, /responses/latest) : coût d'un hit.
+
+Chaque mesure est le meilleur temps d'un appel sur --repeat (stable d'une exécution à
+l'autre, même si la machine est chargée par moments). Référence : perf/baseline_serialization.json (versionnée), comparée
+à titre indicatif à chaque exécution (sans régression signalée si python / architecture / hôte
+diffèrent de ceux enregistrés) ; --baseline compare à une référence enregistrée
+avec --save sur la même machine et échoue si le rendu "après" ralentit de plus de
+--max-regression (25 % par défaut, au-dessus du bruit observé). Le hit en cache (lecture
+d'un attribut, quelques dizaines de ns) n'est qu'indicatif.
+
+Usage (depuis backend/) :
+    python perf/bench_serialization.py [--rows 1000] [--repeat 200]
+    python perf/bench_serialization.py --save /tmp/before.json
+    python perf/bench_serialization.py --baseline /tmp/before.json [--max-regression 0.25]
+"""
+import argparse
+import gzip
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from datetime import datetime, timedelta
+
+os.environ.setdefault("LOG_TO_FILE", "false")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+
+from main import EncodedBody, dumps_json, serialize_response_rows  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_serialization.json")
+MAX_REGRESSION = 0.25
+# Mesure suivie par --baseline : le rendu actuel (l'ancien n'est gardé que pour comparaison)
+CHECKED = ("after_ms",)
+
+
+def fake_rows(count: int) -> list:
+    """Lignes au format de cursor(dictionary=True) : question4 en texte JSON, dates en datetime"""
+    start = datetime(2024, 3, 1, 8, 30)
+    return [
+        {
+            "id": i, "question1": "1 à 3 ans", "question2": "Oui", "question3": "Android",
+            "question4": json.dumps(["Passer et recevoir des appels", "Consulter les réseaux sociaux", "Regarder des vidéos"]),
+            "question5": "Oui", "question6": "Souvent", "question7": "Oui", "question8": "Éducation",
+            "other_sector": None, "question9": "Des technologies qui reposent sur l'utilisation d'algorithmes",
+            "question10": "L'informatique, l'électronique, les mathématiques", "question11": "1950",
+            "question12": "Les États-Unis", "question13": "Des mégadonnées, des données massives",
+            "question14": "La protection de la vie privée", "question15": "Réponse libre numéro %d" % i,
+            "question16": None, "created_at": start + timedelta(seconds=i), "updated_at": start + timedelta(seconds=i),
+        }
+        for i in range(count)
+    ]
+
+
+def serialize_rows_before(responses: list) -> list:
+    for response in responses:
+        if response.get("question4"):
+            try:
+                response["question4"] = json.loads(response["question4"])
+            except json.JSONDecodeError:
+                response["question4"] = []
+        if response.get("created_at"):
+            response["created_at"] = response["created_at"].isoformat()
+        if response.get("updated_at"):
+            response["updated_at"] = response["updated_at"].isoformat()
+    return responses
+
+
+def page(rows: list) -> dict:
+    return {"success": True, "responses": rows, "total": len(rows), "skip": 0, "limit": len(rows),
+            "has_more": True, "next_cursor": "x", "timestamp": datetime.now()}
+
+
+def render_before(rows: list) -> bytes:
+    content = page(serialize_rows_before(rows))
+    content["timestamp"] = content["timestamp"].isoformat()
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def render_after(rows: list) -> bytes:
+    return dumps_json(page(serialize_response_rows(rows)))
+
+
+def timed_ms(func, make_input, repeat: int) -> float:
+    """Meilleur temps d'un appel (ms)"""
+    best = float("inf")
+    for item in [make_input() for _ in range(repeat)]:
+        start = time.perf_counter()
+        func(item)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def compare(results: dict, baseline_path: str, max_regression: float) -> int:
+    with open(baseline_path, encoding="utf-8") as f:
+        reference = json.load(f)
+    comparable = (reference.get("python"), reference.get("machine"), reference.get("host"), reference.get("rows")) == \
+        (platform.python_version(), platform.machine(), platform.node(), results["rows"])
+    if not comparable:
+        print(f"référence produite avec python {reference.get('python')} / {reference.get('machine')} "
+              f"sur {reference.get('host')} / {reference.get('rows')} lignes : écarts indicatifs, aucune régression signalée")
+    regressions = 0
+    for name in CHECKED:
+        before, after = reference["results"][name], results[name]
+        ratio = after / before - 1
+        regressed = comparable and ratio > max_regression
+        regressions += regressed
+        print(f"{name:14} {before:10.3f} -> {after:10.3f} ({ratio:+.0%}){'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--save", help="enregistrer les résultats comme référence")
+    parser.add_argument("--baseline", help="référence à comparer, échec au-delà de --max-regression "
+                                           "(sans cette option : comparaison indicative à perf/baseline_serialization.json)")
+    parser.add_argument("--max-regression", type=float, default=MAX_REGRESSION, help="ralentissement toléré avec --baseline")
+    args = parser.parse_args()
+
+    template = fake_rows(args.rows)
+    fresh = lambda: [dict(row) for row in template]  # noqa: E731
+
+    before_body = render_before(fresh())
+    after_body = render_after(fresh())
+    assert json.loads(before_body)["responses"] == json.loads(after_body)["responses"], "sorties différentes"
+
+    before_ms = timed_ms(render_before, fresh, args.repeat)
+    after_ms = timed_ms(render_after, fresh, args.repeat)
+    # Starlette GZipMiddleware : niveau 9 par défaut
+    gzip_ms = timed_ms(lambda body: gzip.compress(body, 9), lambda: before_body, args.repeat)
+    encoded = EncodedBody(json.loads(after_body))
+    # Quelques dizaines de ns : moyenne sur de nombreux appels, un appel isolé est sous la résolution de l'horloge
+    hit_ms = min(timeit.repeat(lambda: encoded.gzip, number=100_000, repeat=5)) / 100_000 * 1000
+
+    print(f"rows={args.rows} body={len(after_body) / 1024:.0f} KiB gzip={len(encoded.gzip) / 1024:.0f} KiB")
+    print(f"before (json.loads + isoformat + jsonable_encoder + json.dumps) : {before_ms:7.2f} ms/page")
+    print(f"after  (orjson, question4 en Fragment)                          : {after_ms:7.2f} ms/page  (x{before_ms / after_ms:.1f})")
+    print(f"gzip par le middleware (niveau 9), à chaque requête             : {gzip_ms:7.2f} ms/page")
+    print(f"hit du corps pré-compressé en cache                             : {hit_ms * 1000:7.2f} µs/page")
+
+    results = {
+        "rows": args.rows,
+        "before_ms": round(before_ms, 3),
+        "after_ms": round(after_ms, 3),
+        "gzip_ms": round(gzip_ms, 3),
+        "cache_hit_us": round(hit_ms * 1000, 3),
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "host": platform.node(),
+                       "rows": args.rows, "results": results}, f, indent=2)
+            f.write("\n")
+    if args.baseline:
+        sys.exit(1 if compare(results, args.baseline, args.max_regression) else 0)
+    if not args.save and os.path.exists(DEFAULT_BASELINE):
+        print(f"\ncomparaison à {os.path.relpath(DEFAULT_BASELINE)} (indicative) :")
+        compare(results, DEFAULT_BASELINE, args.max_regression)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Vérification EXPLAIN des filtres de recherche / export
+
+Exécute EXPLAIN FORMAT=JSON sur les requêtes produites par build_response_filters()
+(recherche paginée, page suivante par curseur, comptage, export) et échoue si l'une
+d'elles parcourt toute la table, n'utilise pas l'index attendu ou trie en mémoire
+alors que l'index fournit déjà l'ordre.
+
+Le schéma est créé / migré comme au démarrage de l'API (SCHEMA_MIGRATIONS, table schema_migrations).
+Sur une table presque vide l'optimiseur préfère souvent un parcours complet : utiliser
+--seed sur une base de test (DATABASE_NAME) pour insérer des lignes synthétiques.
+
+Usage (depuis backend/) :
+    DATABASE_NAME=formulaire_explain python perf/explain_filters.py [--seed 20000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime
+
+os.environ.setdefault("LOG_TO_FILE", "false")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector  # noqa: E402
+
+from main import (  # noqa: E402
+    DB_HOST, DB_USER, DB_PASSWORD, DB_NAME, EXPORT_COLUMNS, INSERT_RESPONSE_QUERY, RESPONSE_COLUMNS,
+    _backfill_question4_choices, _initialize_database_sync, build_response_filters,
+)
+
+SECTORS = ["Éducation", "Santé", "Finance", "Télécommunications", "Administration", "Commerce"]
+DURATIONS = ["Moins d'un an", "1 à 3 ans", "3 à 5 ans", "Plus de 5 ans"]
+SEED_USER_AGENT = "explain-seed"
+
+# (nom, filtres, index acceptés, tri sans filesort exigé)
+CASES = [
+    ("sector", dict(sector="Santé"), {"idx_sector_created"}, True),
+    ("sector + dates", dict(sector="Santé", date_from="2024-01-01", date_to="2024-03-31"), {"idx_sector_created"}, True),
+    ("sector prefix", dict(sector="Télé", match="prefix"), {"idx_sector_created"}, False),
+    ("duration", dict(smartphone_duration="1 à 3 ans"), {"idx_duration_created"}, True),
+    ("dates", dict(date_from="2024-01-01", date_to="2024-01-31"), {"idx_created_at", "idx_created_at_id"}, True),
+    ("question4 choice", dict(question4_choice="Consulter les mails"), {"idx_choice_response", "PRIMARY"}, False),
+]
+
+
+def seed(conn, rows: int):
+    random.seed(42)
+    cursor = conn.cursor()
+    values = [
+        (
+            random.choice(DURATIONS), "Oui", "Android", json.dumps(["Consulter les mails"]), "Oui",
+            "Oui", "Oui", random.choice(SECTORS), None, "Réponse", "Réponse", "Oui", "Djibouti",
+            "Réponse", "Réponse", None, None, f"seed{i}", f"seed{i}", datetime.now().isoformat(),
+            SEED_USER_AGENT, "1920x1080", "",
+        )
+        for i in range(rows)
+    ]
+    for start in range(0, rows, 1000):
+        cursor.executemany(INSERT_RESPONSE_QUERY, values[start:start + 1000])
+    # Répartir les lignes sur l'année pour que les filtres de dates soient sélectifs
+    cursor.execute(
+        "UPDATE responses SET created_at = '2024-01-01' + INTERVAL (id % 365) DAY + INTERVAL (id % 86400) SECOND "
+        "WHERE user_agent = %s", (SEED_USER_AGENT,)
+    )
+    conn.commit()
+    _backfill_question4_choices(conn, 1, 2**31 - 1)
+    for table in ("responses", "response_question4"):
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+    cursor.close()
+
+
+def table_accesses(plan):
+    """Accès aux tables (access_type, key) et présence d'un filesort dans le plan JSON"""
+    accesses, filesort = [], False
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if "access_type" in node:
+                accesses.append((node.get("table_name"), node["access_type"], node.get("key")))
+            if node.get("using_filesort"):
+                filesort = True
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return accesses, filesort
+
+
+def explain(cursor, query: str, params: list):
+    cursor.execute("EXPLAIN FORMAT=JSON " + query, params)
+    return table_accesses(json.loads(cursor.fetchone()[0]))
+
+
+def queries(where_clause: str, params: list):
+    """Requêtes réellement émises par l'API pour un filtre donné"""
+    yield "page", f"SELECT {RESPONSE_COLUMNS} FROM responses WHERE {where_clause} ORDER BY created_at DESC, id DESC LIMIT %s", [*params, 101], True
+    yield "next page", (
+        f"SELECT {RESPONSE_COLUMNS} FROM responses WHERE {where_clause} "
+        "AND (created_at < %s OR (created_at = %s AND id < %s)) ORDER BY created_at DESC, id DESC LIMIT %s"
+    ), [*params, datetime(2024, 6, 1), datetime(2024, 6, 1), 10**9, 101], True
+    yield "count", f"SELECT COUNT(*) FROM responses WHERE {where_clause}", list(params), False
+    yield "export", f"SELECT {', '.join(EXPORT_COLUMNS)} FROM responses WHERE {where_clause} ORDER BY created_at DESC, id DESC", list(params), True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0, help="lignes synthétiques à insérer avant la vérification")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASSWORD, charset="utf8mb4")
+    _initialize_database_sync(conn)
+    if args.seed:
+        seed(conn, args.seed)
+
+    cursor = conn.cursor()
+    failures = 0
+    for name, filters, expected_keys, ordered in CASES:
+        where_clause, params = build_response_filters(**filters)
+        for label, query, query_params, needs_order in queries(where_clause, params):
+            accesses, filesort = explain(cursor, query, query_params)
+            problems = ["full scan" for _, access_type, _ in accesses if access_type == "ALL"]
+            problems += [f"key={key}" for _, _, key in accesses if key not in expected_keys]
+            if ordered and needs_order and filesort:
+                problems.append("filesort")
+            status = "FAIL " + ", ".join(problems) if problems else "ok"
+            failures += bool(problems)
+            used = ", ".join(f"{access_type}/{key}" for _, access_type, key in accesses)
+            print(f"{name:16} {label:10} {used:40} {status}")
+    cursor.close()
+    conn.close()
+
+    print(f"database={DB_NAME} failures={failures}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
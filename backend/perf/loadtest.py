@@ -0,0 +1,377 @@
+"""
+Test de charge : rafale de /submit et tableaux de bord en interrogation continue
+
+Reproduit le trafic d'une séance de questionnaire : pendant qu'une rafale de
+soumissions valides (FormData) arrive sur /submit, N tableaux de bord interrogent
+/progress et /stats comme le navigateur (If-None-Match, donc des 304 possibles).
+
+Chaque soumission vient d'un participant virtuel distinct (X-Forwarded-For dans la
+plage de test 198.18.0.0/15 + User-Agent propre) : le rate limiting et l'anti-doublon
+s'appliquent comme en production. --ips limite le nombre d'adresses pour les éprouver.
+
+Résultat JSON (stdout ou --output) : débit, p50/p95/p99 par endpoint, répartition des
+statuts et des erreurs. --compare compare le p95 avec un résultat précédent et échoue
+au-delà de --max-regression, pour comparer deux commits sur la même machine.
+
+L'API doit tourner avec une base MySQL locale (docker compose up db), ou être lancée
+par le script avec --spawn (uvicorn main:app, même environnement que ce process) :
+    DATABASE_NAME=formulaire_load MAX_POOL_SIZE=15 python perf/loadtest.py --spawn --submits 2000
+
+Usage (depuis backend/) :
+    python perf/loadtest.py [--url http://127.0.0.1:8000] [--submits 500] [--concurrency 20]
+                            [--dashboards 50] [--output result.json] [--compare baseline.json]
+"""
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Choix proposés par le formulaire (frontend/script.js)
+CHOICES = {
+    "question1": ["Moins d'un an", "Entre 1 et 3 ans", "Entre 3 et 5 ans", "Plus de 5 ans"],
+    "question2": ["Le travail exclusivement", "Le loisir exclusivement", "Les 2"],
+    "question3": [
+        "10% loisirs et 90% professionnel", "30% loisirs et 70% professionnel", "50% loisirs et 50% professionnel",
+        "70% loisirs et 30% professionnel", "90% loisirs et 10% professionnel",
+    ],
+    "question5": ["Moins d'1h", "Entre 1h et 3h", "Entre 3h et 5h", "Plus de 5h"],
+    "question6": ["Moins d'1h", "Entre 1h et 3h", "Entre 3h et 5h", "Plus de 5h"],
+    "question7": ["Moins d'1h", "Entre 1h et 3h", "Entre 3h et 5h", "Plus de 5h"],
+    "question8": [
+        "Télécommunication (Développement, Réseau, ...)", "Santé (Médecine, Infirmerie, Paramédical, Pharmacie, ...)",
+        "Économie et Finance (Banques, Comptabilité, Assurance, ...)", "Éducation (Enseignement pré-scolaire, primaire, secondaire, ...)",
+        "Informatique (Développement logiciel, Cybersécurité, Data Science, ...)", "Autre",
+    ],
+    "question9": [
+        "Des technologies qui reposent sur l'utilisation d'algorithmes visant à simuler l'intelligence humaine",
+        "Des outils pour résoudre des problèmes humains et remplacer l'intelligence humaine",
+        "Des robots dotés d'une conscience et capables d'être autonomes",
+    ],
+    "question10": [
+        "L'informatique, l'électronique, les mathématiques, les neurosciences et les sciences cognitives",
+        "La physique, la chimie, l'informatique, la biologie et les mathématiques",
+    ],
+    "question11": ["1950", "1960", "1990"],
+    "question12": ["La Chine", "La France", "Les États-Unis"],
+    "question13": ["Des mégadonnées, des données massives", "Un logiciel de piratage de données"],
+    "question14": [
+        "Le droit de la santé et du sport", "La protection de la vie privée et la propriété intellectuelle",
+        "La lutte contre le réchauffement climatique",
+    ],
+}
+QUESTION4_CHOICES = [
+    "Passer et recevoir des appels (locaux, internationaux ou en visio)",
+    "Consulter les mails et messages (SMS)",
+    "Consulter les réseaux sociaux (professionnels ou personnels)",
+    "Jouer à des jeux (en ligne ou téléchargés)",
+    "Regarder des vidéos (YouTube, Netflix, Prime Video, ...)",
+    "Manipuler des fichiers (images, photos, documents, ...)",
+]
+FREE_TEXT_WORDS = "l'IA va changer notre travail quotidien santé éducation données formation emploi outils risques".split()
+SCREEN_RESOLUTIONS = ["1920x1080", "1366x768", "390x844", "412x915", "1536x864"]
+
+
+def form_payload(rng: random.Random, index: int) -> dict:
+    """Soumission valide au sens de FormData (mêmes champs que le formulaire)"""
+    payload = {question: rng.choice(options) for question, options in CHOICES.items()}
+    payload["question4"] = rng.sample(QUESTION4_CHOICES, rng.randint(1, 4))
+    payload["other_sector"] = "Artisanat" if payload["question8"] == "Autre" else None
+    for question in ("question15", "question16"):
+        payload[question] = " ".join(rng.choices(FREE_TEXT_WORDS, k=rng.randint(3, 25))) if rng.random() < 0.6 else None
+    payload["browser_fingerprint"] = f"load-{index:08d}-{rng.getrandbits(32):08x}"
+    payload["submission_timestamp"] = datetime.now().isoformat()
+    payload["user_agent"] = f"loadtest/{index}"
+    payload["screen_resolution"] = rng.choice(SCREEN_RESOLUTIONS)
+    return payload
+
+
+def client_ip(index: int) -> str:
+    """Adresse de la plage réservée aux tests de performance (RFC 2544)"""
+    return f"198.{18 + index // 65536 % 2}.{index // 256 % 256}.{index % 256}"
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Percentile au rang le plus proche"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Recorder:
+    """Latences, statuts et erreurs par endpoint, partagés entre les threads"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = defaultdict(Counter)
+        # Les requêtes de la période de chauffe ne sont pas comptées
+        self.measure_from = float("inf")
+        self._lock = threading.Lock()
+
+    def start(self) -> float:
+        self.measure_from = time.perf_counter()
+        return self.measure_from
+
+    def record(self, endpoint: str, started: float, status=None, error: str = None):
+        elapsed = time.perf_counter() - started
+        if started < self.measure_from:
+            return
+        with self._lock:
+            self.latencies[endpoint].append(elapsed)
+            if error:
+                self.errors[endpoint][error] += 1
+            else:
+                self.statuses[endpoint][str(status)] += 1
+
+    def report(self, duration: float) -> dict:
+        endpoints = {}
+        for endpoint in sorted(self.latencies):
+            values = sorted(self.latencies[endpoint])
+            statuses = self.statuses[endpoint]
+            failed = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "throughput_rps": round(len(values) / duration, 2) if duration else 0,
+                "latency_ms": {
+                    "p50": round(percentile(values, 0.50) * 1000, 2),
+                    "p95": round(percentile(values, 0.95) * 1000, 2),
+                    "p99": round(percentile(values, 0.99) * 1000, 2),
+                    "max": round(values[-1] * 1000, 2),
+                    "mean": round(sum(values) / len(values) * 1000, 2),
+                },
+                "status": dict(statuses),
+                "errors": dict(self.errors[endpoint]),
+                "error_rate": round((failed + sum(self.errors[endpoint].values())) / len(values), 4),
+            }
+        return endpoints
+
+
+class Client:
+    """Connexion HTTP/1.1 persistante (une par thread, comme un navigateur ou un proxy)"""
+
+    def __init__(self, base_url: str, timeout: float):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or (443 if parts.scheme == "https" else 80)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.timeout = timeout
+        self.conn = None
+
+    def request(self, method: str, path: str, body: bytes = None, headers: dict = None):
+        if self.conn is None:
+            self.conn = self.connection_class(self.host, self.port, timeout=self.timeout)
+        try:
+            self.conn.request(method, path, body=body, headers=headers or {})
+            response = self.conn.getresponse()
+            return response.status, response.getheaders(), response.read()
+        except Exception:
+            # Connexion inutilisable après une erreur : la suivante en ouvre une neuve
+            self.close()
+            raise
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def timed(recorder: Recorder, client: Client, endpoint: str, method: str, path: str, body=None, headers=None):
+    start = time.perf_counter()
+    try:
+        status, response_headers, _ = client.request(method, path, body, headers)
+    except Exception as e:
+        recorder.record(endpoint, start, error=type(e).__name__)
+        return None, {}
+    recorder.record(endpoint, start, status)
+    return status, dict((name.lower(), value) for name, value in response_headers)
+
+
+def submit_worker(args, recorder: Recorder, counter):
+    client = Client(args.url, args.timeout)
+    rng = random.Random()
+    interval = args.concurrency / args.rate if args.rate else 0
+    next_send = time.perf_counter()
+    try:
+        while True:
+            index = next(counter)
+            if index >= args.submits:
+                return
+            if interval:
+                # Débit imposé (boucle ouverte répartie entre les threads)
+                next_send += interval
+                time.sleep(max(next_send - time.perf_counter(), 0))
+            rng.seed(args.seed * 1_000_003 + index)
+            ip_index = index % args.ips if args.ips else index
+            body = json.dumps(form_payload(rng, index)).encode()
+            timed(recorder, client, "POST /submit", "POST", "/submit", body, {
+                "Content-Type": "application/json",
+                "X-Forwarded-For": client_ip(ip_index),
+                "User-Agent": f"Mozilla/5.0 (loadtest participant {ip_index})",
+            })
+    finally:
+        client.close()
+
+
+def dashboard_worker(args, recorder: Recorder, stop: threading.Event, offset: float):
+    """Tableau de bord : /progress toutes les --poll-interval s, /stats toutes les --stats-interval s"""
+    client = Client(args.url, args.timeout)
+    etags = {}
+    schedule = {"/progress": time.perf_counter() + offset, "/stats": time.perf_counter() + offset}
+    intervals = {"/progress": args.poll_interval, "/stats": args.stats_interval}
+    try:
+        while not stop.is_set():
+            path = min(schedule, key=schedule.get)
+            delay = schedule[path] - time.perf_counter()
+            if delay > 0 and stop.wait(delay):
+                return
+            headers = {"Accept-Encoding": "gzip", "User-Agent": "Mozilla/5.0 (loadtest dashboard)"}
+            if path in etags:
+                headers["If-None-Match"] = etags[path]
+            status, response_headers = timed(recorder, client, f"GET {path}", "GET", path, headers=headers)
+            if status == 200 and "etag" in response_headers:
+                etags[path] = response_headers["etag"]
+            schedule[path] += intervals[path]
+    finally:
+        client.close()
+
+
+def wait_until_ready(url: str, timeout: float):
+    """/health répond dès le lancement : attendre la readiness (base migrée) et la fin de l'amorçage des caches"""
+    client = Client(url, 2)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status, _, body = client.request("GET", "/health/ready")
+            if status == 200 and json.loads(body).get("startup", {}).get("status", "ready") == "ready":
+                return
+        except Exception:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"API non disponible sur {url} après {timeout:.0f}s")
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(result: dict, baseline_path: str, max_regression: float) -> int:
+    """Comparer le p95 de chaque endpoint au résultat de référence ; nombre de régressions"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = 0
+    for endpoint, stats in result["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(endpoint)
+        if not before or not before["latency_ms"]["p95"]:
+            continue
+        ratio = stats["latency_ms"]["p95"] / before["latency_ms"]["p95"] - 1
+        regressed = ratio > max_regression
+        regressions += regressed
+        print(
+            f"{endpoint:16} p95 {before['latency_ms']['p95']:8.1f} -> {stats['latency_ms']['p95']:8.1f} ms "
+            f"({ratio:+.0%}){'  REGRESSION' if regressed else ''}",
+            file=sys.stderr,
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--submits", type=int, default=500, help="nombre total de soumissions de la rafale")
+    parser.add_argument("--concurrency", type=int, default=20, help="soumissions simultanées")
+    parser.add_argument("--rate", type=float, default=0, help="soumissions par seconde (0 = au plus vite)")
+    parser.add_argument("--ips", type=int, default=0, help="adresses client distinctes (0 = une par soumission)")
+    parser.add_argument("--dashboards", type=int, default=50, help="tableaux de bord ouverts")
+    parser.add_argument("--poll-interval", type=float, default=8.0, help="période de /progress (dashboard.html : 8 s)")
+    parser.add_argument("--stats-interval", type=float, default=30.0, help="période de /stats")
+    parser.add_argument("--warmup", type=float, default=2.0, help="secondes de tableaux de bord seuls avant la rafale")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1, help="graine des réponses générées (reproductibilité)")
+    parser.add_argument("--spawn", action="store_true", help="lancer uvicorn main:app le temps du test")
+    parser.add_argument("--output", help="fichier JSON du résultat (défaut : stdout)")
+    parser.add_argument("--compare", help="résultat JSON de référence")
+    parser.add_argument("--max-regression", type=float, default=0.20, help="hausse de p95 tolérée avec --compare")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        parts = urlsplit(args.url)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", parts.hostname, "--port", str(parts.port or 8000),
+             "--log-level", "warning"],
+            cwd=BACKEND_DIR, env={**os.environ, "LOG_TO_FILE": os.environ.get("LOG_TO_FILE", "false")},
+        )
+    try:
+        wait_until_ready(args.url, 60)
+        recorder = Recorder()
+        stop = threading.Event()
+        dashboards = [
+            threading.Thread(
+                target=dashboard_worker, args=(args, recorder, stop, random.uniform(0, args.poll_interval)), daemon=True
+            )
+            for _ in range(args.dashboards)
+        ]
+        for thread in dashboards:
+            thread.start()
+        time.sleep(args.warmup)
+
+        # Compteur partagé (next() sur itertools.count est atomique) : un index unique par soumission
+        counter = itertools.count()
+        start = recorder.start()
+        submitters = [
+            threading.Thread(target=submit_worker, args=(args, recorder, counter), daemon=True)
+            for _ in range(args.concurrency)
+        ]
+        for thread in submitters:
+            thread.start()
+        for thread in submitters:
+            thread.join()
+        duration = time.perf_counter() - start
+        stop.set()
+        for thread in dashboards:
+            thread.join(timeout=args.timeout)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    result = {
+        "revision": git_revision(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        # Réglages de l'API lancée par --spawn (hérités de l'environnement)
+        "server_env": {name: os.environ.get(name) for name in ("MAX_POOL_SIZE", "DB_EXECUTOR_WORKERS", "INGEST_MODE", "WEB_CONCURRENCY")},
+        "duration_s": round(duration, 3),
+        "submit_throughput_rps": round(args.submits / duration, 2) if duration else 0,
+        "endpoints": recorder.report(duration),
+    }
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        sys.exit(1 if compare(result, args.compare, args.max_regression) else 0)
+
+
+if __name__ == "__main__":
+    main()